@@ -1,6 +1,7 @@
 """The spot-hinta.fi integration."""
 from __future__ import annotations
 
+from datetime import timedelta
 import logging
 
 from spothinta_api.const import Region
@@ -10,29 +11,67 @@ from homeassistant.const import CONF_REGION, Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import entity_registry as er
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.typing import ConfigType
 
-from .config_flow import SpotHintaFlowHandler
-from .const import DOMAIN
+from .cache import PriceCache
+from .const import CONF_RESOLUTION, DEFAULT_RESOLUTION, DOMAIN, SIGNAL_UNLOADED
 from .coordinator import SpotHintaDataUpdateCoordinator
+from .fetcher import async_get_fetcher
+from .publication import PublicationPredictor
+from .services import async_setup_services
+from .shared import SharedPriceFile
+from .storage import StorageConfig
+from .transform import PriceTransform
+from .websocket_api import async_setup_websocket_api
 
-PLATFORMS = [Platform.SENSOR]
+PLATFORMS = [Platform.BINARY_SENSOR, Platform.SENSOR]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)  # pylint: disable=invalid-name
 
 _LOGGER = logging.getLogger(__name__)
 
 
+async def async_setup(
+    hass: HomeAssistant, config: ConfigType  # pylint: disable=unused-argument
+) -> bool:
+    """Set up the spot-hinta.fi integration."""
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up spot-hinta.fi from a config entry."""
     region = entry.data[CONF_REGION]
     if isinstance(region, int):
         region = Region(region)
 
-    coordinator = SpotHintaDataUpdateCoordinator(hass, region)
+    resolution = timedelta(
+        minutes=int(entry.options.get(CONF_RESOLUTION, DEFAULT_RESOLUTION))
+    )
+    fetcher = async_get_fetcher(hass)
+    coordinator = SpotHintaDataUpdateCoordinator(
+        hass,
+        region,
+        fetcher,
+        transform=PriceTransform.from_options(entry.options),
+        resolution=resolution,
+        storage=StorageConfig.from_options(entry.options),
+        shared_prices=SharedPriceFile.from_options(
+            hass, entry.options, region, resolution
+        ),
+    )
+    unsubscribe = fetcher.async_subscribe(coordinator)
     try:
         await coordinator.async_config_entry_first_refresh()
     except ConfigEntryNotReady:
-        await coordinator.spothinta.close()
+        unsubscribe()
         raise
 
+    entry.async_on_unload(unsubscribe)
+
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
@@ -47,14 +86,30 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
         if coordinator.future_update:
             coordinator.future_update()
+        async_dispatcher_send(hass, SIGNAL_UNLOADED.format(entry.entry_id))
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored data of a removed spot-hinta.fi config entry."""
+    region = entry.data[CONF_REGION]
+    if isinstance(region, int):
+        region = Region(region)
+
+    await PriceCache(hass, region).async_remove()
+    await PublicationPredictor(hass, region).async_remove()
+
+
 async def async_migrate_entry(hass, config_entry: ConfigEntry):
     """Migrate old entry."""
     _LOGGER.debug("Migrating configuration from version %s.%s", config_entry.version, config_entry.minor_version)
 
+    # The config flow and its schemas are only needed when migrating, so
+    # they are not imported when loading the integration.
+    # pylint: disable-next=import-outside-toplevel
+    from .config_flow import SpotHintaFlowHandler
+
     if config_entry.version > SpotHintaFlowHandler.VERSION:
         # This means the user has downgraded from a future version
         return False
@@ -0,0 +1,107 @@
+"""Support for Spot-Hinta.fi binary sensors."""
+
+from __future__ import annotations
+
+from homeassistant.components.binary_sensor import (
+    DOMAIN as BINARY_SENSOR_DOMAIN,
+    BinarySensorEntity,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CURRENCY_EURO, UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import CONF_PRICE_THRESHOLDS, DOMAIN
+from .coordinator import SpotHintaData, SpotHintaDataUpdateCoordinator
+from .thresholds import CrossingTracker, Threshold
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """Set up Spot-Hinta.fi binary sensors based on a config entry."""
+    coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    async_add_entities(
+        SpotHintaPriceBelowBinarySensorEntity(
+            coordinator=coordinator, price=float(price)
+        )
+        for price in entry.options.get(CONF_PRICE_THRESHOLDS, [])
+    )
+
+
+class SpotHintaPriceBelowBinarySensorEntity(
+    CoordinatorEntity[SpotHintaDataUpdateCoordinator], BinarySensorEntity
+):
+    """Defines a Spot-Hinta.fi binary sensor for the price being below a price.
+
+    The state only changes when a threshold crossing is reached, so it is
+    written from the scheduled crossings instead of on every sensor update.
+    """
+
+    _attr_has_entity_name = True
+    _attr_attribution = "Data provided by Spot-Hinta.fi"
+
+    def __init__(
+        self,
+        *,
+        coordinator: SpotHintaDataUpdateCoordinator,
+        price: float,
+    ) -> None:
+        """Initialize Spot-Hinta.fi binary sensor."""
+        super().__init__(coordinator=coordinator)
+        service_type = "energy"
+        key = f"price_below_{price}".replace(".", "_").replace("-", "minus_")
+        self.entity_id = f"{BINARY_SENSOR_DOMAIN}.{DOMAIN}_{coordinator.region.name.lower()}_{service_type}_{key}"
+        self._attr_unique_id = (
+            f"{coordinator.config_entry.entry_id}_{service_type}_{key}"
+        )
+        self._attr_name = (
+            f"Price below {price:g} {CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}"
+        )
+        self._attr_device_info = DeviceInfo(
+            entry_type=DeviceEntryType.SERVICE,
+            identifiers={
+                (
+                    DOMAIN,
+                    f"{coordinator.config_entry.entry_id}_{service_type}",
+                )
+            },
+            configuration_url="https://spot-hinta.fi",
+            manufacturer="Spot-Hinta.fi",
+            name=f"Energy spot prices for {coordinator.region.name}",
+        )
+        self._tracker = CrossingTracker(
+            coordinator.hass, Threshold(below=price), self._async_crossed
+        )
+        self._data: SpotHintaData | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Start following the threshold crossings."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._tracker.async_cancel)
+        self._async_set_data()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Calculate the crossings again, but only if the prices changed."""
+        if self.coordinator.data is self._data:
+            return
+        self._async_set_data()
+        self.async_write_ha_state()
+
+    @callback
+    def _async_set_data(self) -> None:
+        """Calculate the crossings for the current prices."""
+        self._data = self.coordinator.data
+        self._tracker.async_set_index(self._data.index)
+        self._attr_is_on = self._tracker.is_on
+
+    @callback
+    def _async_crossed(self, is_on: bool) -> None:
+        """Write the state when a threshold crossing is reached."""
+        self._attr_is_on = is_on
+        self.async_write_ha_state()
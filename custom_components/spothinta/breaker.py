@@ -0,0 +1,75 @@
+"""Circuit breaker for the Spot-Hinta.fi API."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Final
+
+from .const import MAX_RETRY_INTERVAL, RETRY_INTERVAL
+
+CLOSED: Final = "closed"
+OPEN: Final = "open"
+HALF_OPEN: Final = "half_open"
+
+
+class CircuitBreaker:
+    """Stop requesting from a failing API until a single probe succeeds.
+
+    The breaker opens when a request fails. While it is open, no requests
+    are made. Once the backoff has passed, it is half-open and lets one
+    probe through: if the probe succeeds the breaker closes, otherwise it
+    opens again with a longer backoff.
+    """
+
+    def __init__(self, host: str) -> None:
+        """Initialize a closed circuit breaker."""
+        self.host = host
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: datetime | None = None
+        self.retry_at: datetime | None = None
+
+    def allow(self, now: datetime) -> bool:
+        """Return true if a request may be made now.
+
+        When the backoff has passed, the breaker turns half-open and only
+        the request allowed by this call is let through until its result
+        is recorded.
+        """
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and self.retry_at is not None and now >= self.retry_at:
+            self.state = HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful request."""
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.retry_at = None
+
+    def record_failure(self, now: datetime) -> None:
+        """Open the breaker after a failed request, backing off exponentially.
+
+        Requests that were already in flight when the breaker opened don't
+        extend the backoff.
+        """
+        if self.state == OPEN:
+            return
+        self.failures += 1
+        self.state = OPEN
+        self.opened_at = now
+        self.retry_at = now + min(
+            RETRY_INTERVAL * 2 ** (self.failures - 1), MAX_RETRY_INTERVAL
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the breaker."""
+        return {
+            "host": self.host,
+            "state": self.state,
+            "failures": self.failures,
+            "opened_at": self.opened_at,
+            "retry_at": self.retry_at,
+        }
@@ -0,0 +1,101 @@
+"""Persistent price cache for Spot-Hinta.fi."""
+from __future__ import annotations
+
+from datetime import timedelta
+import logging
+from typing import Any
+
+from spothinta_api import Electricity
+from spothinta_api.const import Region
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN
+from .price_index import PriceIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+
+class PriceCache:
+    """Cache the last fetched prices of a region on disk.
+
+    The prices are stored as the epoch of the first interval, the interval
+    length and a flat list of prices, with `None` for any gaps. The cache
+    expires when the last interval it covers has ended.
+    """
+
+    def __init__(self, hass: HomeAssistant, region: Region) -> None:
+        """Initialize the price cache for a region."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{region.name.lower()}_prices"
+        )
+
+    async def async_load(self) -> Electricity | None:
+        """Load the cached prices, unless they have expired."""
+        if (data := await self._store.async_load()) is None:
+            return None
+
+        try:
+            if dt_util.utcnow().timestamp() >= data["expires"]:
+                _LOGGER.debug("Cached prices expired")
+                return None
+            return await async_deserialize_prices(data)
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.warning("Ignoring invalid cached prices", exc_info=True)
+            return None
+
+    @callback
+    def async_save(self, index: PriceIndex) -> None:
+        """Save the indexed prices to the cache."""
+        if len(index) == 0:
+            return
+        self._store.async_delay_save(lambda: serialize_prices(index), SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Remove the cache from disk."""
+        await self._store.async_remove()
+
+
+def serialize_prices(index: PriceIndex) -> dict[str, Any]:
+    """Serialize the indexed prices to their compact cached form."""
+    start, prices = index.columns()
+    end = index.timestamps[-1] + index.interval
+
+    return {
+        "time_zone": index.time_zone.key,
+        "interval": index.interval,
+        "start": start,
+        "expires": end,
+        "prices": prices,
+    }
+
+
+async def async_deserialize_prices(data: dict[str, Any]) -> Electricity | None:
+    """Deserialize prices from their compact cached form.
+
+    Raises KeyError, TypeError or ValueError if the data is invalid.
+    """
+    time_zone = await dt_util.async_get_time_zone(data["time_zone"])
+    if time_zone is None:
+        return None
+
+    start: int = data["start"]
+    interval: int = data["interval"]
+    prices = {
+        dt_util.utc_from_timestamp(start + position * interval): price
+        for position, price in enumerate(data["prices"])
+        if price is not None
+    }
+    if not prices:
+        return None
+
+    return Electricity(
+        prices=prices,
+        resolution=timedelta(seconds=interval),
+        time_zone=time_zone,
+    )
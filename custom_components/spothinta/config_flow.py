@@ -1,19 +1,70 @@
 """Config flow for Spot-Hinta.fi integration."""
 from __future__ import annotations
 
+from math import isfinite
+import os
 from typing import Any
 
 from spothinta_api.const import Region
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
-from homeassistant.const import CONF_REGION
-from homeassistant.helpers.selector import SelectSelector, SelectSelectorConfig
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlowWithReload,
+)
+from homeassistant.const import (
+    CONF_REGION,
+    CURRENCY_EURO,
+    PERCENTAGE,
+    UnitOfEnergy,
+    UnitOfPower,
+)
+from homeassistant.core import callback
+from homeassistant.helpers.selector import (
+    EntitySelector,
+    EntitySelectorConfig,
+    NumberSelector,
+    NumberSelectorConfig,
+    NumberSelectorMode,
+    SelectSelector,
+    SelectSelectorConfig,
+    TextSelector,
+)
 
-from .const import DOMAIN
+from .const import (
+    CONF_MARGIN,
+    CONF_PRICE_THRESHOLDS,
+    CONF_RESOLUTION,
+    CONF_SHARED_CACHE_PATH,
+    CONF_STORAGE_CAPACITY,
+    CONF_STORAGE_EFFICIENCY,
+    CONF_STORAGE_POWER,
+    CONF_STORAGE_SOC_ENTITY,
+    CONF_TRANSFER_DAY,
+    CONF_TRANSFER_NIGHT,
+    CONF_TRANSFER_WINTER_DAY,
+    CONF_VAT,
+    CONF_WINDOW_HOURS,
+    DEFAULT_RESOLUTION,
+    DEFAULT_STORAGE_EFFICIENCY,
+    DOMAIN,
+    RESOLUTIONS,
+    WINDOW_HOURS,
+)
 
 REGIONS = [region.name for region in Region]
 
+FEE_SELECTOR = NumberSelector(
+    NumberSelectorConfig(
+        min=0,
+        step="any",
+        mode=NumberSelectorMode.BOX,
+        unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+    ),
+)
+
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_REGION, default=Region.FI.name): SelectSelector(
@@ -24,12 +75,97 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     }
 )
 
+OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_RESOLUTION, default=DEFAULT_RESOLUTION): SelectSelector(
+            SelectSelectorConfig(
+                options=RESOLUTIONS,
+            ),
+        ),
+        vol.Optional(CONF_WINDOW_HOURS, default=[]): SelectSelector(
+            SelectSelectorConfig(
+                options=WINDOW_HOURS,
+                multiple=True,
+                custom_value=True,
+            ),
+        ),
+        vol.Optional(CONF_PRICE_THRESHOLDS, default=[]): SelectSelector(
+            SelectSelectorConfig(
+                options=[],
+                multiple=True,
+                custom_value=True,
+            ),
+        ),
+        vol.Optional(CONF_VAT, default=0): NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                max=100,
+                step="any",
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement="%",
+            ),
+        ),
+        vol.Optional(CONF_MARGIN, default=0): FEE_SELECTOR,
+        vol.Optional(CONF_TRANSFER_DAY, default=0): FEE_SELECTOR,
+        vol.Optional(CONF_TRANSFER_NIGHT, default=0): FEE_SELECTOR,
+        vol.Optional(CONF_TRANSFER_WINTER_DAY): FEE_SELECTOR,
+        vol.Optional(CONF_STORAGE_CAPACITY): NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                step="any",
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+            ),
+        ),
+        vol.Optional(CONF_STORAGE_POWER): NumberSelector(
+            NumberSelectorConfig(
+                min=0,
+                step="any",
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement=UnitOfPower.KILO_WATT,
+            ),
+        ),
+        vol.Optional(
+            CONF_STORAGE_EFFICIENCY, default=DEFAULT_STORAGE_EFFICIENCY
+        ): NumberSelector(
+            NumberSelectorConfig(
+                min=1,
+                max=100,
+                step="any",
+                mode=NumberSelectorMode.BOX,
+                unit_of_measurement=PERCENTAGE,
+            ),
+        ),
+        vol.Optional(CONF_STORAGE_SOC_ENTITY): EntitySelector(
+            EntitySelectorConfig(domain="sensor"),
+        ),
+        vol.Optional(CONF_SHARED_CACHE_PATH): TextSelector(),
+    }
+)
+
+# Options that are removed when they are cleared in the options flow.
+CLEARABLE_OPTIONS = (
+    CONF_TRANSFER_WINTER_DAY,
+    CONF_STORAGE_CAPACITY,
+    CONF_STORAGE_POWER,
+    CONF_STORAGE_SOC_ENTITY,
+    CONF_SHARED_CACHE_PATH,
+)
+
 
 class SpotHintaFlowHandler(ConfigFlow, domain=DOMAIN):  # type: ignore
     """Config flow for Spot-Hinta.fi integration."""
 
     VERSION = 2
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: ConfigEntry,
+    ) -> SpotHintaOptionsFlowHandler:
+        """Get the options flow for this handler."""
+        return SpotHintaOptionsFlowHandler()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -56,3 +192,63 @@ class SpotHintaFlowHandler(ConfigFlow, domain=DOMAIN):  # type: ignore
             title=f"Spot-Hinta.fi region {region}",
             data={CONF_REGION: Region[region]},
         )
+
+
+class SpotHintaOptionsFlowHandler(OptionsFlowWithReload):
+    """Options flow for Spot-Hinta.fi integration."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            window_hours = user_input[CONF_WINDOW_HOURS]
+            price_thresholds = user_input[CONF_PRICE_THRESHOLDS]
+            if not all(
+                hours.isdigit() and 1 <= int(hours) <= 24 for hours in window_hours
+            ):
+                errors[CONF_WINDOW_HOURS] = "invalid_window_hours"
+            if not all(_is_price(price) for price in price_thresholds):
+                errors[CONF_PRICE_THRESHOLDS] = "invalid_price_thresholds"
+            if (
+                shared_cache_path := user_input.get(CONF_SHARED_CACHE_PATH)
+            ) and not (
+                self.hass.config.is_allowed_path(shared_cache_path)
+                and await self.hass.async_add_executor_job(
+                    os.path.isdir, shared_cache_path
+                )
+            ):
+                errors[CONF_SHARED_CACHE_PATH] = "invalid_shared_cache_path"
+
+            if not errors:
+                options = {
+                    **self.config_entry.options,
+                    **user_input,
+                    CONF_WINDOW_HOURS: sorted(set(window_hours), key=int),
+                    CONF_PRICE_THRESHOLDS: sorted(
+                        {str(float(price)) for price in price_thresholds}, key=float
+                    ),
+                }
+                for option in CLEARABLE_OPTIONS:
+                    if option not in user_input:
+                        # Cleared, e.g. the day fee applies all year.
+                        options.pop(option, None)
+                return self.async_create_entry(data=options)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(
+                OPTIONS_SCHEMA, user_input or self.config_entry.options
+            ),
+            errors=errors,
+        )
+
+
+def _is_price(value: str) -> bool:
+    """Return true if the value is a finite price."""
+    try:
+        return isfinite(float(value))
+    except ValueError:
+        return False
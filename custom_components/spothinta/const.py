@@ -1,7 +1,7 @@
 """Constants for the Spot-Hinta.fi integration."""
 from __future__ import annotations
 
-from datetime import timedelta
+from datetime import time, timedelta
 import logging
 from typing import Final
 
@@ -10,6 +10,71 @@ LOGGER = logging.getLogger(__package__)
 SCAN_INTERVAL = timedelta(hours=1)
 THRESHOLD_HOUR: Final = 12
 
+CONF_RESOLUTION: Final = "resolution"
+RESOLUTIONS: Final = ["15", "60"]
+DEFAULT_RESOLUTION: Final = "15"
+
+CONF_WINDOW_HOURS: Final = "window_hours"
+WINDOW_HOURS: Final = ["1", "2", "3", "4", "6", "8", "12"]
+
+CONF_PRICE_THRESHOLDS: Final = "price_thresholds"
+PRICE_QUANTILES: Final = (25, 50, 75)
+
+# Rolling averages of the past prices, and the price range of the coming
+# hours, in hours. The longest rolling average also bounds the history kept
+# in memory.
+ROLLING_AVERAGE_HOURS: Final = (24, 48, 168)
+HORIZON_HOURS: Final = (6, 12, 24)
+
+CONF_VAT: Final = "vat"
+CONF_MARGIN: Final = "margin"
+CONF_TRANSFER_DAY: Final = "transfer_day"
+CONF_TRANSFER_NIGHT: Final = "transfer_night"
+CONF_TRANSFER_WINTER_DAY: Final = "transfer_winter_day"
+
+CONF_STORAGE_CAPACITY: Final = "storage_capacity"
+CONF_STORAGE_POWER: Final = "storage_power"
+CONF_STORAGE_EFFICIENCY: Final = "storage_efficiency"
+CONF_STORAGE_SOC_ENTITY: Final = "storage_soc_entity"
+DEFAULT_STORAGE_EFFICIENCY: Final = 90
+
+# The state of charge of a battery is planned in steps of a fraction of the
+# energy it can charge in one interval, with a limited number of steps in
+# total to keep planning fast on slow hardware.
+STORAGE_POWER_STEPS: Final = 4
+STORAGE_MAX_LEVELS: Final = 64
+
+# Prices shared with other instances through a directory are used instead of
+# fetching if they were fetched this recently, or already cover tomorrow.
+CONF_SHARED_CACHE_PATH: Final = "shared_cache_path"
+SHARED_CACHE_TTL = timedelta(minutes=2)
+
+# Time-of-use transfer tariffs: the night fee applies from 22 to 07 local
+# time, and the winter day fee from November to March.
+NIGHT_START_HOUR: Final = 22
+NIGHT_END_HOUR: Final = 7
+WINTER_MONTHS: Final = frozenset({11, 12, 1, 2, 3})
+
+DATA_FETCHER: Final = "fetcher"
+SIGNAL_PRICES_UPDATED: Final = f"{DOMAIN}_prices_updated_{{}}"
+SIGNAL_UNLOADED: Final = f"{DOMAIN}_unloaded_{{}}"
+MAX_PARALLEL_REQUESTS: Final = 4
+MAX_JITTER_SECONDS: Final = 120
+POLL_INTERVAL = timedelta(minutes=1)
+MAX_POLL_INTERVAL = timedelta(minutes=15)
+RETRY_INTERVAL = timedelta(minutes=5)
+MAX_RETRY_INTERVAL = timedelta(minutes=30)
+
+METRICS_BUFFER_SIZE: Final = 96
+
+# Day-ahead prices are usually published around 13-14:00 CET. Depending on
+# the time of the year, this is either 11-12:00 or 12-13:00 UTC. Until the
+# publication time of a region has been observed, we start polling for new
+# prices at 11:00 UTC.
+DEFAULT_PUBLICATION_TIME = time(11)
+PUBLICATION_HISTORY_SIZE: Final = 8
+PUBLICATION_MARGIN = timedelta(minutes=10)
+
 SERVICE_TYPE_DEVICE_NAMES = {
     "energy": "Energy market prices",
 }
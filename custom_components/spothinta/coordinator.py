@@ -1,22 +1,45 @@
 """The Coordinator for Spot-Hinta.fi."""
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timedelta
 import logging
 from random import randint
-from typing import NamedTuple
+import time
+from typing import Any, NamedTuple
 
-from spothinta_api import Electricity, SpotHinta, SpotHintaConnectionError
+from spothinta_api import Electricity, SpotHintaConnectionError
 from spothinta_api.const import Region
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import CALLBACK_TYPE, HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.helpers.start import async_at_started
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 import homeassistant.util.dt as dt_util
 
-from .const import DOMAIN, LOGGER
+from .cache import PriceCache
+from .const import (
+    DEFAULT_PUBLICATION_TIME,
+    DEFAULT_RESOLUTION,
+    DOMAIN,
+    LOGGER,
+    MAX_JITTER_SECONDS,
+    SIGNAL_PRICES_UPDATED,
+    THRESHOLD_HOUR,
+)
+from .fetcher import SpotHintaFetcher
+from .metrics import INDEX_DURATION, PUBLICATION_DELAY, SCHEDULE_DRIFT, RegionMetrics
+from .price_index import PriceIndex, get_next_interval_start
+from .publication import PublicationPredictor
+from .ranks import PriceRanks
+from .rolling import RollingAggregates
+from .shared import SharedPriceFile
+from .statistics import PriceStatistics
+from .storage import StorageConfig, StoragePlan, plan_storage
+from .transform import PriceTransform
+from .windows import WindowFinder
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,16 +48,43 @@ class SpotHintaData(NamedTuple):
     """Class for defining data in dict."""
 
     energy_today: Electricity
-
-
+    # Shadows `tuple.index`, which is never used on the data.
+    index: PriceIndex  # type: ignore[assignment]
+    windows: WindowFinder
+    ranks: PriceRanks
+    forecast: dict[str, Any]
+    metrics: RegionMetrics
+    # The same data for the total prices, if a transform is configured.
+    total: SpotHintaData | None = None
+    # Rolling aggregates of the spot prices, kept across fetches.
+    rolling: RollingAggregates | None = None
+    # The battery plan over the known prices, if a battery is configured.
+    storage: StoragePlan | None = None
+
+
+# The coordinator owns all per-region state: the prices and their index, the
+# options of the config entry, and the cache, statistics and metrics helpers.
+# pylint: disable-next=too-many-instance-attributes
 class SpotHintaDataUpdateCoordinator(DataUpdateCoordinator[SpotHintaData]):
     """Class to manage fetching Spot-Hinta.fi data from single endpoint."""
 
     config_entry: ConfigEntry
     region: Region
     current_data: Electricity | None
-
-    def __init__(self, hass: HomeAssistant, region: Region) -> None:
+    current_index: PriceIndex | None
+
+    # Every option of the config entry is passed by keyword.
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        hass: HomeAssistant,
+        region: Region,
+        fetcher: SpotHintaFetcher,
+        *,
+        transform: PriceTransform | None = None,
+        resolution: timedelta = timedelta(minutes=int(DEFAULT_RESOLUTION)),
+        storage: StorageConfig | None = None,
+        shared_prices: SharedPriceFile | None = None,
+    ) -> None:
         """Initialize global Spot-Hinta.fi data updater."""
         super().__init__(
             hass,
@@ -43,134 +93,362 @@ class SpotHintaDataUpdateCoordinator(DataUpdateCoordinator[SpotHintaData]):
         )
 
         self.future_update: CALLBACK_TYPE | None = None
+        self.next_update_at: datetime | None = None
         self.region = region
-        self.spothinta = SpotHinta(session=async_get_clientsession(hass))
+        self.fetcher = fetcher
+        self.transform = transform
+        self.resolution = resolution
+        self.storage = storage
+        self.shared_prices = shared_prices
+        self.cache = PriceCache(hass, region)
+        self.metrics = RegionMetrics()
+        self.rolling = RollingAggregates(int(resolution.total_seconds()))
+        self.publication = PublicationPredictor(hass, region)
+        self.statistics = PriceStatistics(hass, region)
         self.current_data = None
+        self.current_index = None
+        self._prices_data: SpotHintaData | None = None
 
-    async def async_request_update(self, *_) -> None:
-        """Request update from coordinator."""
-        await self.async_request_refresh()
-
-    async def _async_update_data(self) -> SpotHintaData:
-        """Fetch data from spot-hinta.fi."""
+    @callback
+    def async_handle_tick(self, *_) -> None:
+        """Update the sensors when a new price interval starts.
 
+        The prices don't change between fetches, so there is no need to run
+        a full refresh. The listeners are only told that a new interval has
+        started, and the sensors write their state if their value changed.
+        """
         now = dt_util.utcnow()
+        if self.next_update_at is not None:
+            self.metrics.record(
+                SCHEDULE_DRIFT, now, (now - self.next_update_at).total_seconds()
+            )
+
+        self.future_update = None
+        if self.current_index is not None:
+            self.rolling.advance(self.current_index, now)
+        self._async_request_prices_if_needed(now)
+        self._schedule_update(get_next_interval_start(now, self.resolution))
+        self.async_update_listeners()
+
+    @callback
+    def async_set_prices(self, energy_prices: Electricity) -> None:
+        """Store prices fetched by the shared fetch engine."""
+        if energy_prices is self.current_data:
+            return
+
+        waiting_for_tomorrow = (
+            self.current_index is not None
+            and not has_prices_for_tomorrow(self.current_index)
+        )
 
-        # The normal happy path, we have the enough for prices for today and
-        # tomorrow, no need to trigger any external requests.
-        if self.current_data is not None and has_prices_for_tomorrow_until_next_day_refresh(self.current_data):
-            # Trigger an update of the sensors at the next quarter of the hour.
-            next_update_at = get_next_quarter_of_hour(now)
-            self.future_update = async_track_point_in_time(
-                self.hass, self.async_request_update, next_update_at
+        if (merged := self._merge_prices(energy_prices)) == 0:
+            # Nothing new, today's prices don't change once published.
+            return
+        if merged is None:
+            self._set_prices(energy_prices)
+
+        assert self.current_index is not None
+        if waiting_for_tomorrow and has_prices_for_tomorrow(self.current_index):
+            # Time from the scheduled publication of tomorrow's prices until
+            # we got them.
+            now = dt_util.utcnow()
+            scheduled = datetime.combine(
+                now.date(), DEFAULT_PUBLICATION_TIME, tzinfo=dt_util.UTC
             )
+            self.metrics.record(
+                PUBLICATION_DELAY, now, (now - scheduled).total_seconds()
+            )
+            self.publication.async_record(now)
 
-            return SpotHintaData(energy_today=self.current_data)
+        self.cache.async_save(self.current_index)
+        self._async_import_statistics()
 
-        # Day-ahead prices are usually published around 13-14:00 CET. Depending
-        # on the time of the year, this is either 11-12:00 or 12-13:00 UTC. We
-        # start polling for new prices at 11:00 UTC.
-        if self.current_data is None or now.hour >= 11 or not has_prices_for_tomorrow_until_next_day_refresh(self.current_data):
-            random_delay = randint(0, 120)
+        if self.data is not None:
+            self.async_set_updated_data(self._data())
+            self._async_send_prices()
 
-            # We want to get the prices for tomorrow, but we want to avoid
-            # having all instances of the integration polling at the same second.
-            if self.current_data is not None and now.minute == 0 and now.second == 0:
-                next_update_at = now + timedelta(seconds=random_delay)
-                _LOGGER.debug("Getting prices for tomorrow in %s seconds", random_delay)
+    def _set_prices(self, energy_prices: Electricity) -> None:
+        """Set the current prices and build the index for them."""
+        started = time.monotonic()
 
-                self.future_update = async_track_point_in_time(
-                    self.hass, self.async_request_update, next_update_at
-                )
+        # Index the prices once per fetch, the sensors only do cheap lookups
+        # in it on every update.
+        index = PriceIndex(energy_prices)
+        self.current_data = energy_prices
+        self.current_index = index
+        self.rolling.advance(index, dt_util.utcnow())
+        self._prices_data = self._build_data(energy_prices, index)
 
-                return SpotHintaData(energy_today=self.current_data)
+        self.metrics.record(
+            INDEX_DURATION, dt_util.utcnow(), time.monotonic() - started
+        )
 
-            try:
-                self.current_data = await self.spothinta.energy_prices(region=self.region, resolution=timedelta(minutes=15))
-            except SpotHintaConnectionError as err:
-                _LOGGER.warning("Failed to get energy prices", exc_info=True)
+    def _build_data(
+        self, energy_prices: Electricity, index: PriceIndex
+    ) -> SpotHintaData:
+        """Build the data for the sensors from the indexed prices."""
+        total = None
+        if self.transform is not None:
+            # Transform the whole price array once per fetch, the total price
+            # sensors only do lookups in the index of the total prices.
+            total_index = self.transform.apply(index)
+            total = SpotHintaData(
+                energy_today=energy_prices,
+                index=total_index,
+                windows=WindowFinder(total_index),
+                ranks=PriceRanks(total_index),
+                forecast=build_forecast(total_index),
+                metrics=self.metrics,
+            )
 
-                # The refresh failed, but we already have some data which we can
-                # return while scheduling a new refresh in a few minutes.
-                if self.current_data is not None:
-                    next_update_at = (
-                        now + timedelta(minutes=5) + timedelta(seconds=random_delay)
-                    )
-                    _LOGGER.debug("Retrying fetching energy prices %s", next_update_at)
+        storage = None
+        if self.storage is not None:
+            # The battery is planned once per fetch, against the prices it is
+            # actually charged at.
+            storage = plan_storage(
+                total.index if total is not None else index,
+                self.storage,
+                self.state_of_charge(self.storage),
+            )
 
-                    self.future_update = async_track_point_in_time(
-                        self.hass, self.async_request_update, next_update_at
-                    )
+        return SpotHintaData(
+            energy_today=energy_prices,
+            index=index,
+            windows=WindowFinder(index),
+            ranks=PriceRanks(index),
+            forecast=build_forecast(index),
+            metrics=self.metrics,
+            total=total,
+            rolling=self.rolling,
+            storage=storage,
+        )
+
+    def state_of_charge(self, storage: StorageConfig) -> float:
+        """Return the energy stored in the battery now, in kWh."""
+        if storage.state_of_charge_entity is None or (
+            state := self.hass.states.get(storage.state_of_charge_entity)
+        ) is None:
+            return 0.0
+        try:
+            percent = float(state.state)
+        except ValueError:
+            return 0.0
+        return storage.capacity * min(max(percent, 0.0), 100.0) / 100
+
+    def _merge_prices(self, energy_prices: Electricity) -> int | None:
+        """Merge the prices of new intervals into the current prices in place.
+
+        Most fetches only differ from the current prices by the prices for
+        tomorrow, so only those are indexed. Returns the number of merged
+        prices, or None if the fetch doesn't continue the current prices,
+        e.g. once the day has changed.
+        """
+        index = self.current_index
+        if (
+            index is None
+            or self.current_data is None
+            or not continues_index(index, energy_prices)
+        ):
+            return None
+
+        started = time.monotonic()
+
+        last = index.time_at(len(index) - 1)
+        new_prices = {
+            timestamp: price
+            for timestamp, price in energy_prices.prices.items()
+            if timestamp > last
+        }
+        if not new_prices:
+            return 0
+
+        index.extend(new_prices)
+        self.current_data.prices.update(new_prices)
+        self.rolling.advance(index, dt_util.utcnow())
+        self._prices_data = self._build_data(self.current_data, index)
+
+        self.metrics.record(
+            INDEX_DURATION, dt_util.utcnow(), time.monotonic() - started
+        )
+        _LOGGER.debug(
+            "Merged %s new prices for %s", len(new_prices), self.region.name
+        )
+        return len(new_prices)
+
+    def needs_prices(self, now: datetime) -> bool:
+        """Return true if new prices should be fetched for this region."""
+        if has_prices_for_tomorrow_until_next_day_refresh(self.current_index):
+            return False
+        if not self.has_prices_for_today():
+            return True
 
-                    return SpotHintaData(energy_today=self.current_data)
-
-                raise UpdateFailed(
-                    "Error communicating with Spot-Hinta.fi API"
-                ) from err
-
-        if has_prices_for_tomorrow_until_next_day_refresh(self.current_data):
-            _LOGGER.debug("Got prices until tomorrow's refresh")
-            next_update_at = get_next_quarter_of_hour(now)
-        elif now.hour >= 11 and not has_prices_for_tomorrow(self.current_data):
-            # Try again in a few minutes if there were no prices at all for
-            # tomorrow. This can happen if the prices for tomorrow haven't
-            # been published yet.
-            next_update_at = now + timedelta(minutes=3)
-            _LOGGER.debug(
-                "Tomorrow's prices not yet available, next check: %s",
-                str(next_update_at),
+        # Today's prices are fixed, so there's no point in fetching again
+        # before the prices for tomorrow are expected to be published.
+        return now >= self.publication.next_poll(now)
+
+    def has_prices_for_today(self) -> bool:
+        """Return true if the prices for today have been fetched."""
+        return (
+            self.current_index is not None
+            and self.current_index.day_prices(0) is not None
+        )
+
+    @callback
+    def async_next_poll(self, now: datetime) -> datetime | None:
+        """Return when to poll next for tomorrow's prices, if still needed."""
+        if has_prices_for_tomorrow(self.current_index):
+            return None
+        return self.publication.async_polled(now)
+
+    async def _async_update_data(self) -> SpotHintaData:
+        """Fetch data from spot-hinta.fi."""
+
+        now = dt_util.utcnow()
+
+        # Start from the prices cached on disk, if any, so that setting up
+        # the config entry doesn't have to wait for the API.
+        if self.current_data is None:
+            _, cached = await asyncio.gather(
+                self.publication.async_load(), self.cache.async_load()
             )
+            if cached is not None and cached.resolution == self.resolution:
+                _LOGGER.debug("Using cached prices for %s", self.region.name)
+                self._set_prices(cached)
+                # The entities are set up from the cached prices right away,
+                # the API and the recorder can wait until Home Assistant has
+                # started.
+                self.config_entry.async_on_unload(
+                    async_at_started(self.hass, self._async_started)
+                )
+            else:
+                try:
+                    self.async_set_prices(
+                        await self.fetcher.async_fetch(self.region)
+                    )
+                except SpotHintaConnectionError as err:
+                    raise UpdateFailed(
+                        "Error communicating with Spot-Hinta.fi API"
+                    ) from err
         else:
-            # We got some prices but not yet until the next day refresh.
-            _LOGGER.info("Not all prices for tomorrow available from the API yet")
-            next_update_at = get_next_quarter_of_hour(now)
-
-        _LOGGER.debug("Next update: %s", str(next_update_at))
-        self.future_update = async_track_point_in_time(
-            self.hass, self.async_request_update, next_update_at
+            self._async_request_prices_if_needed(now)
+
+        # Trigger an update of the sensors when the next interval starts.
+        self._schedule_update(get_next_interval_start(now, self.resolution))
+
+        self._async_send_prices()
+        return self._data()
+
+    @callback
+    def _async_started(self, _hass: HomeAssistant) -> None:
+        """Catch up with the API and the statistics after starting from cache."""
+        self._async_import_statistics()
+        self._async_request_prices_if_needed(dt_util.utcnow())
+
+    @callback
+    def _async_request_prices_if_needed(self, now: datetime) -> None:
+        """Ask the shared fetch engine for new prices if ours are stale."""
+        if has_prices_for_tomorrow_until_next_day_refresh(self.current_index):
+            return
+
+        if self.has_prices_for_today():
+            # The shared fetch engine polls for tomorrow's prices once they
+            # are expected to be published, and pushes them to us.
+            self.fetcher.async_poll_at(self.publication.next_poll(now))
+            return
+
+        # We want to get the prices for today, but we want to avoid having
+        # all instances of the integration polling at the same second. The
+        # shared fetch engine pushes the new prices to us once they have
+        # been fetched, until then the sensors keep using the prices we
+        # already have.
+        delay = 0
+        if now.minute == 0 and now.second == 0:
+            delay = randint(0, MAX_JITTER_SECONDS)
+            _LOGGER.debug("Getting prices for today in %s seconds", delay)
+        self.fetcher.async_request(self.region, delay)
+
+    @callback
+    def _async_send_prices(self) -> None:
+        """Send the current prices to the triggers of this config entry."""
+        async_dispatcher_send(
+            self.hass,
+            SIGNAL_PRICES_UPDATED.format(self.config_entry.entry_id),
+            self._data(),
         )
 
-        return SpotHintaData(
-            energy_today=self.current_data,
+    @callback
+    def _async_import_statistics(self) -> None:
+        """Import the hours of the current prices into the statistics."""
+        data = self._data()
+        self.hass.async_create_background_task(
+            self.statistics.async_import(
+                data.index, data.total.index if data.total is not None else None
+            ),
+            f"{DOMAIN}_{self.region.name}_statistics",
         )
 
+    @callback
+    def _schedule_update(self, next_update_at: datetime) -> None:
+        """Schedule the next update, replacing any already scheduled one."""
+        _LOGGER.debug("Next update: %s", str(next_update_at))
+        if self.future_update:
+            self.future_update()
+        self.next_update_at = next_update_at
+        self.future_update = async_track_point_in_time(
+            self.hass, self.async_handle_tick, next_update_at
+        )
 
-def get_next_quarter_of_hour(now: datetime) -> datetime:
-    """Get the next quarter of the hour."""
-    next_update_at = now + timedelta(minutes=15)
-    next_minute = next_update_at.minute // 15 * 15
-    next_update_at = next_update_at.replace(
-        minute=next_minute, second=0, microsecond=0, tzinfo=dt_util.UTC
+    def _data(self) -> SpotHintaData:
+        """Return the current data together with its precomputed index."""
+        assert self._prices_data is not None
+        return self._prices_data
+
+
+def build_forecast(index: PriceIndex) -> dict[str, Any]:
+    """Return all known prices in a compact form for the forecast sensor."""
+    if len(index) == 0:
+        return {}
+
+    start, prices = index.columns()
+    return {
+        "start": start,
+        "interval": index.interval,
+        "prices": [round(price, 5) if price is not None else None for price in prices],
+    }
+
+
+def continues_index(index: PriceIndex, energy_prices: Electricity) -> bool:
+    """Return true if fetched prices start from the first indexed interval."""
+    return (
+        len(index) > 0
+        and bool(energy_prices.prices)
+        and energy_prices.resolution == index.resolution
+        and energy_prices.time_zone == index.time_zone
+        and min(energy_prices.prices).timestamp() == index.timestamps[0]
     )
-    return next_update_at
 
 
-def has_prices_for_tomorrow_until_next_day_refresh(energy_prices: Electricity | None) -> bool:
-    """Returns true if there are prices for tomorrow until the next day refresh in the given energy prices"""
-    if energy_prices is None:
+def has_prices_for_tomorrow_until_next_day_refresh(index: PriceIndex | None) -> bool:
+    """Return true if the prices cover tomorrow until the next day refresh."""
+    if index is None or len(index) == 0:
         return False
 
-    now = dt_util.utcnow()
-    for timestamp in energy_prices.prices.keys():
-        # The prices for tomorrow are usually published around 13-14:00 CET.
-        # Depending on the time of the year, this is either 11-12:00 or
-        # 12-13:00 UTC. If we have prices until 12:00 UTC tomorrow, we can
-        # wait with polling for new prices until the next day refresh, even
-        # if we don't have prices for the whole tomorrow yet.
-        if timestamp.day > now.day and timestamp.hour >= 12:
-            return True
-
-    return False
+    # The prices for tomorrow are usually published around 13-14:00 CET.
+    # Depending on the time of the year, this is either 11-12:00 or 12-13:00
+    # UTC. If we have prices until 12:00 UTC tomorrow, we can wait with
+    # polling for new prices until the next day refresh, even if we don't
+    # have prices for the whole tomorrow yet.
+    return index.timestamps[-1] >= _tomorrow_epoch() + THRESHOLD_HOUR * 3600
 
 
-def has_prices_for_tomorrow(energy_prices: Electricity | None) -> bool:
-    """Returns true if there are prices for tomorrow in the given energy prices"""
-    if energy_prices is None:
+def has_prices_for_tomorrow(index: PriceIndex | None) -> bool:
+    """Return true if there are any prices for tomorrow in the index."""
+    if index is None or len(index) == 0:
         return False
 
-    now = dt_util.utcnow()
-    for timestamp in energy_prices.prices.keys():
-        if timestamp.day > now.day:
-            return True
+    return index.timestamps[-1] >= _tomorrow_epoch()
+
 
-    return False
+def _tomorrow_epoch() -> int:
+    """Return the epoch of the start of tomorrow, in UTC."""
+    return (int(dt_util.utcnow().timestamp()) // 86400 + 1) * 86400
@@ -7,6 +7,7 @@ from typing import Any
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_REGION
 from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
 
 from . import SpotHintaDataUpdateCoordinator
 from .const import DOMAIN
@@ -17,6 +18,7 @@ async def async_get_config_entry_diagnostics(
 ) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
     coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    index = coordinator.data.index
 
     return {
         "entry": {
@@ -24,14 +26,22 @@ async def async_get_config_entry_diagnostics(
             "region": entry.data[CONF_REGION],
         },
         "energy": {
-            "current_hour_price": coordinator.data.energy_today.current_price,
-            "next_hour_price": coordinator.data.energy_today.price_at_time(
-                coordinator.data.energy_today.now_in_timezone() + timedelta(hours=1)
+            "current_hour_price": index.current_price,
+            "next_hour_price": index.price_at_time(
+                dt_util.utcnow() + timedelta(hours=1)
             ),
-            "average_price": coordinator.data.energy_today.average_price_today,
-            "max_price": coordinator.data.energy_today.highest_price_today,
-            "min_price": coordinator.data.energy_today.lowest_price_today,
-            "highest_price_time": coordinator.data.energy_today.highest_price_time_today,
-            "lowest_price_time": coordinator.data.energy_today.lowest_price_time_today,
+            "average_price": index.average_price_today,
+            "max_price": index.highest_price_today,
+            "min_price": index.lowest_price_today,
+            "highest_price_time": index.highest_price_time_today,
+            "lowest_price_time": index.lowest_price_time_today,
         },
+        "metrics": coordinator.metrics.as_dict(),
+        "next_poll": coordinator.publication.next_poll(dt_util.utcnow()),
+        "circuit_breaker": coordinator.fetcher.breaker.as_dict(),
+        "shared_prices": (
+            str(coordinator.shared_prices.path)
+            if coordinator.shared_prices is not None
+            else None
+        ),
     }
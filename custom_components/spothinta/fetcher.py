@@ -0,0 +1,334 @@
+"""Shared fetch engine for all configured Spot-Hinta.fi regions."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+import logging
+from random import randint
+import time
+from typing import TYPE_CHECKING
+
+from spothinta_api import Electricity, SpotHinta, SpotHintaConnectionError
+from spothinta_api.const import API_HOST, Region
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_point_in_time
+import homeassistant.util.dt as dt_util
+
+from .breaker import HALF_OPEN, OPEN, CircuitBreaker
+from .const import (
+    DATA_FETCHER,
+    DEFAULT_RESOLUTION,
+    DOMAIN,
+    MAX_JITTER_SECONDS,
+    MAX_PARALLEL_REQUESTS,
+)
+from .metrics import FETCH_DURATION, PAYLOAD_SIZE, RETRIES
+
+if TYPE_CHECKING:
+    from .coordinator import SpotHintaDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_fetcher(hass: HomeAssistant) -> SpotHintaFetcher:
+    """Return the shared fetch engine, creating it if needed."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (fetcher := domain_data.get(DATA_FETCHER)) is None:
+        fetcher = domain_data[DATA_FETCHER] = SpotHintaFetcher(hass)
+    return fetcher
+
+
+# The fetch engine keeps the state of the batches, the requests in flight and
+# the refreshes waiting for them, all shared between the regions.
+# pylint: disable-next=too-many-instance-attributes
+class SpotHintaFetcher:
+    """Fetch prices for all subscribed regions in coordinated batches.
+
+    All region coordinators share one client and one HTTP session. Requests
+    for different regions are collected into a single batch, fetched with a
+    bounded number of parallel requests, and the results are pushed to the
+    subscribed coordinators. Polling for tomorrow's prices and retrying on
+    errors is scheduled once for all regions instead of once per region.
+    Refreshes of a region that is already being fetched share the request
+    in flight, and a circuit breaker stops requests to a failing API until
+    a single probe succeeds.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the shared fetch engine."""
+        self.hass = hass
+        self._client: SpotHinta | None = None
+
+        self._coordinators: dict[Region, SpotHintaDataUpdateCoordinator] = {}
+        self._queued: set[Region] = set()
+        self._waiters: dict[Region, list[asyncio.Future[Electricity]]] = {}
+        self._semaphore = asyncio.Semaphore(MAX_PARALLEL_REQUESTS)
+        self._unsub_batch: CALLBACK_TYPE | None = None
+        self._batch_at: datetime | None = None
+        self._in_flight: set[Region] = set()
+        self.breaker = CircuitBreaker(API_HOST)
+
+    @property
+    def spothinta(self) -> SpotHinta:
+        """Return the client, creating it on the first fetch."""
+        if self._client is None:
+            self._client = SpotHinta(session=async_get_clientsession(self.hass))
+        return self._client
+
+    @callback
+    def async_subscribe(
+        self, coordinator: SpotHintaDataUpdateCoordinator
+    ) -> CALLBACK_TYPE:
+        """Subscribe a region coordinator to fetched prices."""
+        region = coordinator.region
+        self._coordinators[region] = coordinator
+
+        @callback
+        def unsubscribe() -> None:
+            if self._coordinators.get(region) is coordinator:
+                del self._coordinators[region]
+            self._queued.discard(region)
+
+            if not self._coordinators:
+                self._async_shutdown()
+
+        return unsubscribe
+
+    async def async_fetch(self, region: Region) -> Electricity:
+        """Fetch the prices for a region as part of an immediate batch."""
+        future: asyncio.Future[Electricity] = self.hass.loop.create_future()
+        self._waiters.setdefault(region, []).append(future)
+        self._queued.add(region)
+        self._async_schedule_batch(0)
+        return await future
+
+    @callback
+    def async_request(self, region: Region, delay: float = 0) -> None:
+        """Queue a region for the next batch, the result is pushed later."""
+        self._queued.add(region)
+        self._async_schedule_batch(delay)
+
+    @callback
+    def async_poll_at(self, poll_at: datetime) -> None:
+        """Schedule a batch for the regions that are due to be polled."""
+        self._async_schedule_batch(
+            max((poll_at - dt_util.utcnow()).total_seconds(), 0)
+        )
+
+    @callback
+    def _async_schedule_batch(self, delay: float) -> None:
+        """Schedule the next batch, unless an earlier one is already scheduled."""
+        run_at = dt_util.utcnow() + timedelta(seconds=delay)
+        if self._unsub_batch is not None:
+            if self._batch_at is not None and self._batch_at <= run_at:
+                return
+            self._unsub_batch()
+
+        self._batch_at = run_at
+        if delay <= 0:
+            # Run on the next iteration of the event loop, so that regions
+            # queued in the meantime are still batched, without waiting for
+            # the clock to pass the scheduled time.
+            handle = self.hass.loop.call_soon(self._async_start_batch)
+            self._unsub_batch = handle.cancel
+            return
+
+        self._unsub_batch = async_track_point_in_time(
+            self.hass, self._async_run_batch, run_at
+        )
+
+    @callback
+    def _async_start_batch(self) -> None:
+        """Start a batch that is due right away."""
+        self.hass.async_create_task(self._async_run_batch(dt_util.utcnow()))
+
+    async def _async_run_batch(self, _now: datetime) -> None:
+        """Fetch the prices for all regions that need them."""
+        self._unsub_batch = None
+        self._batch_at = None
+
+        now = dt_util.utcnow()
+        regions = list(
+            (
+                self._queued
+                | {
+                    region
+                    for region, coordinator in self._coordinators.items()
+                    if coordinator.needs_prices(now)
+                }
+            )
+            # Regions already being fetched get the result of that request,
+            # including the refreshes waiting for it.
+            - self._in_flight
+        )
+        self._queued.clear()
+        if not regions:
+            return
+
+        if not self.breaker.allow(now):
+            self._async_defer(regions, now)
+            return
+        if self.breaker.state == HALF_OPEN:
+            # Probe the API with a single region, the others follow once
+            # it has answered.
+            self._queued.update(regions[1:])
+            regions = regions[:1]
+
+        _LOGGER.debug(
+            "Fetching energy prices for %s", ", ".join(r.name for r in regions)
+        )
+        self._in_flight.update(regions)
+        try:
+            results = await asyncio.gather(
+                *(self._async_fetch_region(region) for region in regions),
+                return_exceptions=True,
+            )
+        finally:
+            self._in_flight.difference_update(regions)
+
+        now = dt_util.utcnow()
+        failed: list[Region] = []
+        poll: dict[Region, datetime] = {}
+        for region, result in zip(regions, results, strict=True):
+            if isinstance(result, BaseException):
+                _LOGGER.warning(
+                    "Failed to get energy prices for %s",
+                    region.name,
+                    exc_info=result,
+                )
+                # Any error counts as a failure, so that a failed probe
+                # doesn't close the breaker and the region is retried.
+                failed.append(region)
+            elif (next_poll := self._async_push(region, result, now)) is not None:
+                poll[region] = next_poll
+            self._async_resolve_waiters(region, result)
+
+        if failed:
+            self.breaker.record_failure(now)
+            self._async_defer(failed, now)
+        else:
+            self.breaker.record_success()
+            if self._queued:
+                self._async_schedule_batch(0)
+
+        if poll:
+            # Try again when the prices for tomorrow are expected to be
+            # published, or a bit later if they are late. The batch then
+            # includes every region that is due to be polled.
+            next_poll = min(poll.values())
+            _LOGGER.debug(
+                "Tomorrow's prices not yet available for %s, polling again at %s",
+                ", ".join(r.name for r in poll),
+                next_poll,
+            )
+            self.async_poll_at(next_poll)
+
+    @callback
+    def _async_push(
+        self, region: Region, energy_prices: Electricity, now: datetime
+    ) -> datetime | None:
+        """Push fetched prices to a region, and return when to poll it next."""
+        if (coordinator := self._coordinators.get(region)) is None:
+            return None
+        coordinator.async_set_prices(energy_prices)
+        return coordinator.async_next_poll(now)
+
+    @callback
+    def _async_resolve_waiters(
+        self, region: Region, result: Electricity | BaseException
+    ) -> None:
+        """Hand the result of a fetch to the refreshes waiting for it."""
+        for future in self._waiters.pop(region, []):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @callback
+    def _async_defer(self, regions: list[Region], now: datetime) -> None:
+        """Retry regions once the circuit breaker lets a probe through.
+
+        While the breaker is open, refreshes waiting for the prices fail
+        right away instead of waiting for the backoff. Regions without any
+        data yet are retried by Home Assistant when setting up the config
+        entry again.
+        """
+        if self.breaker.state != OPEN:
+            # A probe is in flight, and schedules the next batch once it
+            # has answered.
+            self._queued.update(regions)
+            return
+
+        assert self.breaker.retry_at is not None
+        error = SpotHintaConnectionError(
+            f"Spot-Hinta.fi API unavailable, retrying at {self.breaker.retry_at}"
+        )
+        for region in {*regions, *self._queued}:
+            for future in self._waiters.pop(region, []):
+                if not future.done():
+                    future.set_exception(error)
+
+            coordinator = self._coordinators.get(region)
+            if coordinator is not None and coordinator.current_data is not None:
+                self._queued.add(region)
+            else:
+                self._queued.discard(region)
+
+        if self._queued:
+            delay = max(
+                (self.breaker.retry_at - now).total_seconds(), 0
+            ) + randint(0, MAX_JITTER_SECONDS)
+            _LOGGER.debug("Retrying fetching energy prices in %s seconds", delay)
+            self._async_schedule_batch(delay)
+
+    async def _async_fetch_region(self, region: Region) -> Electricity:
+        """Fetch the prices for a single region.
+
+        If the prices are shared with other instances, the shared prices are
+        used when another instance has already fetched them, and the prices
+        fetched by this instance are shared.
+        """
+        coordinator = self._coordinators.get(region)
+        shared = coordinator.shared_prices if coordinator is not None else None
+        if shared is not None and (cached := await shared.async_load()) is not None:
+            _LOGGER.debug("Using shared prices for %s", region.name)
+            return cached
+
+        async with self._semaphore:
+            started = time.monotonic()
+            energy_prices = await self.spothinta.energy_prices(
+                region=region, resolution=self._resolution(region)
+            )
+            duration = time.monotonic() - started
+
+        if coordinator is not None:
+            now = dt_util.utcnow()
+            coordinator.metrics.record(FETCH_DURATION, now, duration)
+            coordinator.metrics.record(PAYLOAD_SIZE, now, len(energy_prices.prices))
+            coordinator.metrics.record(RETRIES, now, self.breaker.failures)
+        if shared is not None:
+            await shared.async_save(energy_prices)
+
+        return energy_prices
+
+    def _resolution(self, region: Region) -> timedelta:
+        """Return the price resolution configured for a region."""
+        if (coordinator := self._coordinators.get(region)) is not None:
+            return coordinator.resolution
+        return timedelta(minutes=int(DEFAULT_RESOLUTION))
+
+    @callback
+    def _async_shutdown(self) -> None:
+        """Stop the fetch engine when the last region is unsubscribed."""
+        if self._unsub_batch is not None:
+            self._unsub_batch()
+            self._unsub_batch = None
+            self._batch_at = None
+
+        if self.hass.data.get(DOMAIN, {}).get(DATA_FETCHER) is self:
+            del self.hass.data[DOMAIN][DATA_FETCHER]
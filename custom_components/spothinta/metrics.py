@@ -0,0 +1,70 @@
+"""Hot path instrumentation for Spot-Hinta.fi."""
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime
+from typing import Any
+
+from .const import METRICS_BUFFER_SIZE
+
+FETCH_DURATION = "fetch_duration"
+INDEX_DURATION = "index_duration"
+PAYLOAD_SIZE = "payload_size"
+RETRIES = "retries"
+PUBLICATION_DELAY = "publication_delay"
+SCHEDULE_DRIFT = "schedule_drift"
+
+METRICS = (
+    FETCH_DURATION,
+    INDEX_DURATION,
+    PAYLOAD_SIZE,
+    RETRIES,
+    PUBLICATION_DELAY,
+    SCHEDULE_DRIFT,
+)
+
+
+class RegionMetrics:
+    """Fixed-size ring buffers with hot path measurements of a region.
+
+    Durations and delays are in seconds, the payload size is the number of
+    prices in a fetch. Percentiles are cached until the next measurement.
+    """
+
+    def __init__(self, size: int = METRICS_BUFFER_SIZE) -> None:
+        """Initialize the ring buffers."""
+        self._samples: dict[str, deque[tuple[datetime, float]]] = {
+            metric: deque(maxlen=size) for metric in METRICS
+        }
+        self._percentiles: dict[tuple[str, int], float | None] = {}
+
+    def record(self, metric: str, at: datetime, value: float) -> None:
+        """Record a measurement."""
+        self._samples[metric].append((at, value))
+        self._percentiles = {}
+
+    def percentile(self, metric: str, percent: int) -> float | None:
+        """Return a percentile of the buffered measurements of a metric."""
+        key = (metric, percent)
+        if key not in self._percentiles:
+            values = sorted(value for _, value in self._samples[metric])
+            self._percentiles[key] = (
+                round(values[(len(values) - 1) * percent // 100], 3)
+                if values
+                else None
+            )
+        return self._percentiles[key]
+
+    def latest(self, metric: str) -> float | None:
+        """Return the last measurement of a metric."""
+        samples = self._samples[metric]
+        return samples[-1][1] if samples else None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all buffered measurements."""
+        return {
+            metric: [
+                {"at": at.isoformat(), "value": value} for at, value in samples
+            ]
+            for metric, samples in self._samples.items()
+        }
@@ -0,0 +1,325 @@
+"""Precomputed price index for Spot-Hinta.fi energy prices."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from copy import copy
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
+
+from spothinta_api import Electricity
+
+import homeassistant.util.dt as dt_util
+
+
+class DayPrices(NamedTuple):
+    """Precomputed aggregates for the prices of a single local day."""
+
+    start: int
+    end: int
+    lowest_price: float
+    highest_price: float
+    average_price: float
+    lowest_price_index: int
+    highest_price_index: int
+
+
+# The index keeps its arrays and precomputed aggregates as attributes, and
+# every sensor value is a lookup method of its own, so both counts grow with
+# the sensors it serves.
+# pylint: disable-next=too-many-instance-attributes,too-many-public-methods
+class PriceIndex:
+    """Sorted, array-backed index over the prices of a single fetch.
+
+    The index is built once per fetch. All lookups done when updating the
+    sensors are constant time, or a binary search if there are gaps in the
+    prices, instead of walking the whole price dict of the `Electricity`
+    object for every aggregate. Times are mapped to their intervals with
+    integer math on the interval length, so any resolution works the same.
+    """
+
+    def __init__(self, energy_prices: Electricity) -> None:
+        """Build the index from the given energy prices."""
+        items = sorted(energy_prices.prices.items())
+
+        self.time_zone: ZoneInfo = energy_prices.time_zone
+        self.resolution: timedelta = energy_prices.resolution
+        self.interval = int(energy_prices.resolution.total_seconds())
+        self.timestamps = array("q", (int(ts.timestamp()) for ts, _ in items))
+        self.prices = array("d", (price for _, price in items))
+        self.days: dict[date, DayPrices] = {}
+        # The positions of every complete day sorted by price, and the rank of
+        # every position within its day, starting from 1 for the cheapest.
+        # Equal prices share the lowest of their ranks.
+        self.order = array("i")
+        self.ranks = array("i")
+        self.contiguous = False
+        self._build_days(0)
+        self._update_contiguous()
+
+    def __len__(self) -> int:
+        """Return the number of prices in the index."""
+        return len(self.timestamps)
+
+    def extend(self, prices: dict[datetime, float]) -> int:
+        """Append the prices for intervals after the last indexed one.
+
+        Prices for intervals that are already indexed are ignored. Returns
+        the number of appended prices.
+        """
+        last = self.timestamps[-1] if self.timestamps else None
+        items = sorted(
+            (int(ts.timestamp()), price)
+            for ts, price in prices.items()
+            if last is None or ts.timestamp() > last
+        )
+        if not items:
+            return 0
+
+        # Only the last, possibly partial, day and the new days need their
+        # aggregates to be recalculated.
+        first_new = len(self.timestamps)
+        if last is not None:
+            day = dt_util.utc_from_timestamp(last).astimezone(self.time_zone).date()
+            first_new = bisect_right(
+                self.timestamps, _local_midnight(day, self.time_zone) - 1
+            )
+
+        self.timestamps.extend(timestamp for timestamp, _ in items)
+        self.prices.extend(price for _, price in items)
+        self._build_days(first_new)
+        self._update_contiguous()
+        return len(items)
+
+    def with_prices(self, prices: array[float]) -> PriceIndex:
+        """Return an index over other prices for the same intervals."""
+        index = copy(self)
+        index.timestamps = array("q", self.timestamps)
+        index.prices = prices
+        index.days = {}
+        index.order = array("i")
+        index.ranks = array("i")
+        # The copy is an index of its own, only its days are built again.
+        index._build_days(0)  # pylint: disable=protected-access
+        return index
+
+    def _update_contiguous(self) -> None:
+        """Check if there is a price for every interval in the index.
+
+        If there is, the position of any time is calculated from the first
+        timestamp instead of searched for.
+        """
+        timestamps = self.timestamps
+        self.contiguous = (
+            len(timestamps) > 0
+            and timestamps[-1] - timestamps[0]
+            == (len(timestamps) - 1) * self.interval
+        )
+
+    def _build_days(self, start: int) -> None:
+        """Group the prices by local day and precompute the aggregates.
+
+        Starts from the given position, which must be the first position of a
+        local day. Only days with a price for every interval are included,
+        matching how `Electricity` treats partial days as having no prices at
+        all.
+        """
+        timestamps = self.timestamps
+        if (missing := len(timestamps) - len(self.ranks)) > 0:
+            self.order.extend(array("i", [0]) * missing)
+            self.ranks.extend(array("i", [0]) * missing)
+
+        while start < len(timestamps):
+            day = dt_util.utc_from_timestamp(timestamps[start]).astimezone(
+                self.time_zone
+            ).date()
+            day_end = _local_midnight(day + timedelta(days=1), self.time_zone)
+            end = bisect_right(timestamps, day_end - 1, lo=start)
+
+            if end - start == self._expected_intervals(day):
+                self._index_day(day, start, end)
+
+            start = end
+
+    def _index_day(self, day: date, start: int, end: int) -> None:
+        """Precompute the aggregates and the price order of a complete day."""
+        prices = self.prices
+        lowest = min(range(start, end), key=prices.__getitem__)
+        highest = max(range(start, end), key=prices.__getitem__)
+        self.days[day] = DayPrices(
+            start=start,
+            end=end,
+            lowest_price=round(prices[lowest], 5),
+            highest_price=round(prices[highest], 5),
+            average_price=round(sum(prices[start:end]) / (end - start), 5),
+            lowest_price_index=lowest,
+            highest_price_index=highest,
+        )
+
+        day_order = sorted(range(start, end), key=prices.__getitem__)
+        self.order[start:end] = array("i", day_order)
+        ranks = self.ranks
+        rank = 0
+        previous: float | None = None
+        for count, position in enumerate(day_order, 1):
+            if prices[position] != previous:
+                rank = count
+                previous = prices[position]
+            ranks[position] = rank
+
+    def _expected_intervals(self, day: date) -> int:
+        """Return the number of intervals in a local day, accounting for DST."""
+        day_start = _local_midnight(day, self.time_zone)
+        day_end = _local_midnight(day + timedelta(days=1), self.time_zone)
+        return max(1, (day_end - day_start) // self.interval)
+
+    @property
+    def end(self) -> datetime | None:
+        """Return the end of the last known interval."""
+        if not self.timestamps:
+            return None
+        return self.time_at(len(self.timestamps) - 1) + self.resolution
+
+    def columns(self) -> tuple[int, list[float | None]]:
+        """Return the prices in a compact, columnar form.
+
+        The prices are returned as the epoch of the first interval and a flat
+        list with one price per interval, with `None` for any gaps.
+        """
+        start = self.timestamps[0]
+        columns: list[float | None] = [None] * (
+            (self.timestamps[-1] - start) // self.interval + 1
+        )
+        for timestamp, price in zip(self.timestamps, self.prices, strict=True):
+            columns[(timestamp - start) // self.interval] = price
+        return start, columns
+
+    def day_prices(self, days_from_today: int = 0) -> DayPrices | None:
+        """Return the aggregates for today, or a day relative to today."""
+        today = dt_util.now(self.time_zone).date()
+        return self.days.get(today + timedelta(days=days_from_today))
+
+    def time_at(self, position: int) -> datetime:
+        """Return the start time of the interval at the given position."""
+        return dt_util.utc_from_timestamp(self.timestamps[position])
+
+    def position_at(self, moment: datetime) -> int | None:
+        """Return the position of the interval containing the given time."""
+        epoch = moment.timestamp()
+        if self.contiguous:
+            position = int((epoch - self.timestamps[0]) // self.interval)
+            return position if 0 <= position < len(self.timestamps) else None
+
+        position = bisect_right(self.timestamps, epoch) - 1
+        if position < 0 or epoch >= self.timestamps[position] + self.interval:
+            return None
+        return position
+
+    def position_ending_after(self, moment: datetime) -> int:
+        """Return the position of the first interval ending after a time.
+
+        All intervals before the returned position end at or before the
+        given time.
+        """
+        epoch = moment.timestamp() - self.interval
+        if self.contiguous:
+            position = int((epoch - self.timestamps[0]) // self.interval) + 1
+            return min(max(position, 0), len(self.timestamps))
+
+        return bisect_right(self.timestamps, epoch)
+
+    def rank_at_time(self, moment: datetime) -> int | None:
+        """Return the rank of the price at a time within its day."""
+        position = self.position_at(moment)
+        if position is None or self.ranks[position] == 0:
+            return None
+        return self.ranks[position]
+
+    def price_at_time(self, moment: datetime) -> float | None:
+        """Return the price at a specific time."""
+        if (position := self.position_at(moment)) is None:
+            return None
+        return round(self.prices[position], 5)
+
+    @property
+    def current_price(self) -> float | None:
+        """Return the price for the current interval."""
+        return self.price_at_time(dt_util.utcnow())
+
+    @property
+    def next_price(self) -> float | None:
+        """Return the price for the interval after the current one."""
+        return self.price_at_time(dt_util.utcnow() + self.resolution)
+
+    @property
+    def lowest_price_today(self) -> float | None:
+        """Return the minimum price today."""
+        day = self.day_prices(0)
+        return day.lowest_price if day else None
+
+    @property
+    def lowest_price_tomorrow(self) -> float | None:
+        """Return the minimum price tomorrow."""
+        day = self.day_prices(1)
+        return day.lowest_price if day else None
+
+    @property
+    def highest_price_today(self) -> float | None:
+        """Return the maximum price today."""
+        day = self.day_prices(0)
+        return day.highest_price if day else None
+
+    @property
+    def highest_price_tomorrow(self) -> float | None:
+        """Return the maximum price tomorrow."""
+        day = self.day_prices(1)
+        return day.highest_price if day else None
+
+    @property
+    def average_price_today(self) -> float | None:
+        """Return the average price today."""
+        day = self.day_prices(0)
+        return day.average_price if day else None
+
+    @property
+    def average_price_tomorrow(self) -> float | None:
+        """Return the average price tomorrow."""
+        day = self.day_prices(1)
+        return day.average_price if day else None
+
+    @property
+    def lowest_price_time_today(self) -> datetime | None:
+        """Return the time of the lowest price today."""
+        day = self.day_prices(0)
+        return self.time_at(day.lowest_price_index) if day else None
+
+    @property
+    def lowest_price_time_tomorrow(self) -> datetime | None:
+        """Return the time of the lowest price tomorrow."""
+        day = self.day_prices(1)
+        return self.time_at(day.lowest_price_index) if day else None
+
+    @property
+    def highest_price_time_today(self) -> datetime | None:
+        """Return the time of the highest price today."""
+        day = self.day_prices(0)
+        return self.time_at(day.highest_price_index) if day else None
+
+    @property
+    def highest_price_time_tomorrow(self) -> datetime | None:
+        """Return the time of the highest price tomorrow."""
+        day = self.day_prices(1)
+        return self.time_at(day.highest_price_index) if day else None
+
+
+def _local_midnight(day: date, time_zone: ZoneInfo) -> int:
+    """Return the epoch of the local midnight starting the given day."""
+    return int(datetime.combine(day, time(), tzinfo=time_zone).timestamp())
+
+
+def get_next_interval_start(moment: datetime, resolution: timedelta) -> datetime:
+    """Return the start of the next interval of the given resolution."""
+    interval = int(resolution.total_seconds())
+    start = (int(moment.timestamp()) // interval + 1) * interval
+    return dt_util.utc_from_timestamp(start)
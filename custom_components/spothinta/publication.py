@@ -0,0 +1,129 @@
+"""Publication time predictor for the Spot-Hinta.fi day-ahead prices."""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+import logging
+from random import randint
+from typing import Any
+
+from spothinta_api.const import Region
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    DEFAULT_PUBLICATION_TIME,
+    DOMAIN,
+    MAX_JITTER_SECONDS,
+    MAX_POLL_INTERVAL,
+    POLL_INTERVAL,
+    PUBLICATION_HISTORY_SIZE,
+    PUBLICATION_MARGIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+
+
+class PublicationPredictor:
+    """Learn when the prices for tomorrow are published for a region.
+
+    The times the prices for tomorrow were first seen are stored per weekday,
+    as minutes after midnight UTC. Polling starts a margin before the
+    earliest recently observed time for the weekday, and backs off
+    exponentially if the prices are late.
+    """
+
+    def __init__(self, hass: HomeAssistant, region: Region) -> None:
+        """Initialize the publication time predictor for a region."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{region.name.lower()}_publication"
+        )
+        self._history: dict[int, list[int]] = {}
+        # Avoid having all instances of the integration polling at the same
+        # second, while keeping the first poll of the day at a stable time.
+        self._jitter = timedelta(seconds=randint(0, MAX_JITTER_SECONDS))
+        self._next_poll: datetime | None = None
+        self._polls = 0
+
+    async def async_load(self) -> None:
+        """Load the observed publication times."""
+        if (data := await self._store.async_load()) is None:
+            return
+
+        try:
+            self._history = {
+                int(weekday): [int(minutes) for minutes in history][
+                    -PUBLICATION_HISTORY_SIZE:
+                ]
+                for weekday, history in data["history"].items()
+            }
+        except (AttributeError, KeyError, TypeError, ValueError):
+            _LOGGER.warning("Ignoring invalid publication history", exc_info=True)
+
+    def predict(self, day: date) -> datetime:
+        """Return when to start polling for the prices published on a day."""
+        history = self._history.get(day.weekday()) or [
+            minutes for history in self._history.values() for minutes in history
+        ]
+        if not history:
+            return datetime.combine(day, DEFAULT_PUBLICATION_TIME, tzinfo=dt_util.UTC)
+
+        return (
+            datetime.combine(day, time(), tzinfo=dt_util.UTC)
+            + timedelta(minutes=min(history))
+            - PUBLICATION_MARGIN
+        )
+
+    def next_poll(self, now: datetime) -> datetime:
+        """Return when to poll next for the prices for tomorrow."""
+        first_poll = self.predict(now.date()) + self._jitter
+        if self._next_poll is None or self._next_poll < first_poll:
+            # Not polled yet today.
+            return first_poll
+        return self._next_poll
+
+    @callback
+    def async_polled(self, now: datetime) -> datetime:
+        """Record a poll without prices for tomorrow, return the next poll."""
+        first_poll = self.predict(now.date()) + self._jitter
+        if self._next_poll is None or self._next_poll < first_poll:
+            self._polls = 0
+
+        if now < first_poll:
+            self._next_poll = None
+        else:
+            # The prices are late, poll more often at first and then back off.
+            self._next_poll = now + min(
+                POLL_INTERVAL * 2**self._polls, MAX_POLL_INTERVAL
+            )
+            self._polls += 1
+
+        return self.next_poll(now)
+
+    @callback
+    def async_record(self, seen_at: datetime) -> None:
+        """Record when the prices for tomorrow were first seen.
+
+        If they were found on the first poll, they may have been published
+        earlier than predicted. The margin subtracted when predicting then
+        starts the polling a bit earlier the next time.
+        """
+        history = self._history.setdefault(seen_at.weekday(), [])
+        history.append(seen_at.hour * 60 + seen_at.minute)
+        del history[:-PUBLICATION_HISTORY_SIZE]
+        self._next_poll = None
+        self._polls = 0
+
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_remove(self) -> None:
+        """Remove the observed publication times from disk."""
+        await self._store.async_remove()
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the observed publication times to store."""
+        return {"history": self._history}
@@ -0,0 +1,100 @@
+"""Price ranks, percentiles and quantiles for Spot-Hinta.fi."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, insort
+from math import ceil
+
+import homeassistant.util.dt as dt_util
+
+from .const import PRICE_QUANTILES
+from .price_index import PriceIndex
+
+DAY = 24 * 60 * 60
+
+
+class PriceRanks:
+    """Rank the indexed prices within their day and the next 24 hours.
+
+    The prices of every day are sorted once when indexing. The ranks and
+    quantiles of the 24 hours starting at every interval are calculated once
+    per fetch with a sorted sliding window, so every lookup done when
+    updating the sensors is a single indexed read. In both, equal prices
+    share the lowest of their ranks.
+    """
+
+    def __init__(self, index: PriceIndex) -> None:
+        """Calculate the ranks for the indexed prices."""
+        self._index = index
+
+        count = len(index)
+        self._rolling_ranks = array("i", [0]) * count
+        self._rolling_counts = array("i", [0]) * count
+        self._rolling_quantiles = {
+            percent: array("d", [0.0]) * count for percent in PRICE_QUANTILES
+        }
+
+        timestamps = index.timestamps
+        prices = index.prices
+        window: list[float] = []
+        end = count
+        for position in range(count - 1, -1, -1):
+            insort(window, prices[position])
+            while timestamps[end - 1] >= timestamps[position] + DAY:
+                end -= 1
+                del window[bisect_left(window, prices[end])]
+
+            self._rolling_ranks[position] = bisect_left(window, prices[position]) + 1
+            self._rolling_counts[position] = len(window)
+            for percent, quantiles in self._rolling_quantiles.items():
+                quantiles[position] = window[_quantile_position(len(window), percent)]
+
+    @property
+    def rank_today(self) -> int | None:
+        """Return the rank of the current price today, 1 being the cheapest."""
+        return self._index.rank_at_time(dt_util.utcnow())
+
+    @property
+    def percentile_today(self) -> float | None:
+        """Return the rank of the current price as a share of today's prices."""
+        day = self._index.day_prices(0)
+        if day is None or (rank := self.rank_today) is None:
+            return None
+        return round(rank / (day.end - day.start) * 100, 1)
+
+    @property
+    def rank_24h(self) -> int | None:
+        """Return the rank of the current price within the next 24 hours."""
+        if (position := self._index.position_at(dt_util.utcnow())) is None:
+            return None
+        return self._rolling_ranks[position]
+
+    @property
+    def percentile_24h(self) -> float | None:
+        """Return the rank of the current price as a share of the next 24h."""
+        if (position := self._index.position_at(dt_util.utcnow())) is None:
+            return None
+        return round(
+            self._rolling_ranks[position] / self._rolling_counts[position] * 100, 1
+        )
+
+    def quantile(self, percent: int, days_from_today: int = 0) -> float | None:
+        """Return a quantile of the prices of today, or a day relative to it."""
+        index = self._index
+        if (day := index.day_prices(days_from_today)) is None:
+            return None
+        position = index.order[
+            day.start + _quantile_position(day.end - day.start, percent)
+        ]
+        return round(index.prices[position], 5)
+
+    def quantile_24h(self, percent: int) -> float | None:
+        """Return a quantile of the prices in the next 24 hours."""
+        if (position := self._index.position_at(dt_util.utcnow())) is None:
+            return None
+        return round(self._rolling_quantiles[percent][position], 5)
+
+
+def _quantile_position(count: int, percent: int) -> int:
+    """Return the position of a quantile in sorted prices, by nearest rank."""
+    return max(0, ceil(count * percent / 100) - 1)
@@ -0,0 +1,169 @@
+"""Rolling price aggregates for Spot-Hinta.fi."""
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime
+
+import homeassistant.util.dt as dt_util
+
+from .const import HORIZON_HOURS, ROLLING_AVERAGE_HOURS
+from .price_index import PriceIndex
+
+HOUR = 3600
+
+
+class SlidingWindow:
+    """Average, minimum and maximum of the prices in a sliding window.
+
+    Prices enter the window at the end and leave it from the start, in time
+    order. The average comes from prefix sums stored with every price, and
+    the minimum and maximum from monotonic deques, so moving the window by
+    one interval is amortized constant time.
+    """
+
+    def __init__(self, maxlen: int | None = None) -> None:
+        """Initialize an empty window holding at most `maxlen` prices."""
+        # The start of every interval, its price and the sum of all prices
+        # pushed so far, including it.
+        self._prices: deque[tuple[int, float, float]] = deque(maxlen=maxlen)
+        self._lowest: deque[tuple[int, float]] = deque()
+        self._highest: deque[tuple[int, float]] = deque()
+        self._sum = 0.0
+
+    def __len__(self) -> int:
+        """Return the number of prices in the window."""
+        return len(self._prices)
+
+    def push(self, timestamp: int, price: float) -> None:
+        """Add the price of the interval after the last one."""
+        self._sum += price
+        self._prices.append((timestamp, price, self._sum))
+
+        lowest = self._lowest
+        while lowest and lowest[-1][1] >= price:
+            lowest.pop()
+        lowest.append((timestamp, price))
+
+        highest = self._highest
+        while highest and highest[-1][1] <= price:
+            highest.pop()
+        highest.append((timestamp, price))
+
+        # The oldest price is dropped when the window is full.
+        self._expire_extremes(self._prices[0][0])
+
+    def expire(self, start: int) -> None:
+        """Remove the prices of the intervals starting before a time."""
+        prices = self._prices
+        while prices and prices[0][0] < start:
+            prices.popleft()
+        if not prices:
+            self._sum = 0.0
+        self._expire_extremes(start)
+
+    def _expire_extremes(self, start: int) -> None:
+        """Remove the minimum and maximum candidates starting before a time."""
+        while self._lowest and self._lowest[0][0] < start:
+            self._lowest.popleft()
+        while self._highest and self._highest[0][0] < start:
+            self._highest.popleft()
+
+    @property
+    def average(self) -> float | None:
+        """Return the average price in the window."""
+        if not (prices := self._prices):
+            return None
+        first = prices[0]
+        return round((prices[-1][2] - first[2] + first[1]) / len(prices), 5)
+
+    @property
+    def minimum(self) -> float | None:
+        """Return the lowest price in the window."""
+        return round(self._lowest[0][1], 5) if self._lowest else None
+
+    @property
+    def maximum(self) -> float | None:
+        """Return the highest price in the window."""
+        return round(self._highest[0][1], 5) if self._highest else None
+
+
+class RollingAggregates:
+    """Rolling averages of the past prices and the range of the coming ones.
+
+    The past windows keep the prices of the intervals up to and including
+    the current one, so they outlive the fetches and days of the index. The
+    longest of them is the bounded history of the region. The coming
+    windows cover the known prices from the current interval on. Every
+    interval is pushed to every window once, when the coordinator moves to
+    it.
+    """
+
+    def __init__(self, interval: int) -> None:
+        """Initialize empty windows for intervals of the given length."""
+        self._past = {
+            hours: SlidingWindow(maxlen=hours * HOUR // interval)
+            for hours in ROLLING_AVERAGE_HOURS
+        }
+        self._coming = {hours: SlidingWindow() for hours in HORIZON_HOURS}
+        # The start of the last interval pushed to the past windows, and to
+        # every coming window.
+        self._past_last: int | None = None
+        self._coming_last: dict[int, int | None] = dict.fromkeys(HORIZON_HOURS)
+
+    def advance(self, index: PriceIndex, now: datetime) -> None:
+        """Move the windows to the interval containing the given time."""
+        if len(index) == 0:
+            return
+
+        interval = index.interval
+        current = int(now.timestamp()) // interval * interval
+
+        end = current + interval
+        for timestamp, price in _prices_between(index, self._past_last, end):
+            for window in self._past.values():
+                window.push(timestamp, price)
+            self._past_last = timestamp
+        for hours, window in self._past.items():
+            window.expire(end - hours * HOUR)
+
+        for hours, window in self._coming.items():
+            window.expire(current)
+            last = self._coming_last[hours]
+            if last is None or last < current - interval:
+                last = current - interval
+            for timestamp, price in _prices_between(
+                index, last, current + hours * HOUR
+            ):
+                window.push(timestamp, price)
+                last = timestamp
+            self._coming_last[hours] = last
+
+    def average(self, hours: int) -> float | None:
+        """Return the average price of the past hours, up to now."""
+        return self._past[hours].average
+
+    def lowest(self, hours: int) -> float | None:
+        """Return the lowest known price in the coming hours."""
+        return self._coming[hours].minimum
+
+    def highest(self, hours: int) -> float | None:
+        """Return the highest known price in the coming hours."""
+        return self._coming[hours].maximum
+
+
+def _prices_between(
+    index: PriceIndex, after: int | None, before: int
+) -> list[tuple[int, float]]:
+    """Return the indexed prices of the intervals between two times."""
+    timestamps = index.timestamps
+    if after is None:
+        position = 0
+    else:
+        position = index.position_ending_after(
+            dt_util.utc_from_timestamp(after + index.interval)
+        )
+
+    end = position
+    while end < len(timestamps) and timestamps[end] < before:
+        end += 1
+    return list(zip(timestamps[position:end], index.prices[position:end]))
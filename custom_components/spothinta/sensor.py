@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 from collections.abc import Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime, timedelta
+from typing import Any
 
 from homeassistant.components.sensor import (
     DOMAIN as SENSOR_DOMAIN,
@@ -14,22 +15,45 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CURRENCY_EURO, EntityCategory, UnitOfEnergy
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CURRENCY_EURO,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfEnergy,
+    UnitOfTime,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+import homeassistant.util.dt as dt_util
 
-from .const import DOMAIN
+from .const import (
+    CONF_WINDOW_HOURS,
+    DOMAIN,
+    HORIZON_HOURS,
+    PRICE_QUANTILES,
+    ROLLING_AVERAGE_HOURS,
+)
 from .coordinator import SpotHintaData, SpotHintaDataUpdateCoordinator
+from .metrics import (
+    FETCH_DURATION,
+    INDEX_DURATION,
+    PAYLOAD_SIZE,
+    PUBLICATION_DELAY,
+    RETRIES,
+    SCHEDULE_DRIFT,
+)
+from .storage import ACTIONS
+from .windows import PriceWindow
 
 
 @dataclass(frozen=True)
 class SpotHintaSensorEntityDescriptionMixin:
     """Mixin for required keys."""
 
-    value_fn: Callable[[SpotHintaData], float | datetime | None]
+    value_fn: Callable[[SpotHintaData], float | str | datetime | None]
     service_type: str
 
 
@@ -39,6 +63,8 @@ class SpotHintaSensorEntityDescription(
 ):
     """Describes Spot-Hinta.fi sensor entity."""
 
+    attr_fn: Callable[[SpotHintaData], dict[str, Any] | None] = lambda _: None
+
 
 SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
     SpotHintaSensorEntityDescription(
@@ -47,32 +73,28 @@ SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
         service_type="energy",
         state_class=SensorStateClass.MEASUREMENT,
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
-        value_fn=lambda data: (
-            data.energy_today.current_price if data.energy_today else None
-        ),
+        value_fn=lambda data: data.index.current_price,
     ),
     SpotHintaSensorEntityDescription(
         key="next_price",
         name="Next price",
         service_type="energy",
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
-        value_fn=lambda data: data.energy_today.price_at_time(
-            data.energy_today.now_in_timezone() + timedelta(minutes=15)
-        ),
+        value_fn=lambda data: data.index.next_price,
     ),
     SpotHintaSensorEntityDescription(
         key="average_price_today",
         name="Average - Today",
         service_type="energy",
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
-        value_fn=lambda data: data.energy_today.average_price_today,
+        value_fn=lambda data: data.index.average_price_today,
     ),
     SpotHintaSensorEntityDescription(
         key="average_price_tomorrow",
         name="Average - Tomorrow",
         service_type="energy",
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
-        value_fn=lambda data: data.energy_today.average_price_tomorrow,
+        value_fn=lambda data: data.index.average_price_tomorrow,
     ),
     SpotHintaSensorEntityDescription(
         key="max_price_today",
@@ -80,7 +102,7 @@ SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
         service_type="energy",
         entity_category=EntityCategory.DIAGNOSTIC,
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
-        value_fn=lambda data: data.energy_today.highest_price_today,
+        value_fn=lambda data: data.index.highest_price_today,
     ),
     SpotHintaSensorEntityDescription(
         key="max_price_tomorrow",
@@ -88,7 +110,7 @@ SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
         service_type="energy",
         entity_category=EntityCategory.DIAGNOSTIC,
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
-        value_fn=lambda data: data.energy_today.highest_price_tomorrow,
+        value_fn=lambda data: data.index.highest_price_tomorrow,
     ),
     SpotHintaSensorEntityDescription(
         key="min_price_today",
@@ -96,7 +118,7 @@ SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
         service_type="energy",
         entity_category=EntityCategory.DIAGNOSTIC,
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
-        value_fn=lambda data: data.energy_today.lowest_price_today,
+        value_fn=lambda data: data.index.lowest_price_today,
     ),
     SpotHintaSensorEntityDescription(
         key="min_price_tomorrow",
@@ -104,7 +126,7 @@ SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
         service_type="energy",
         entity_category=EntityCategory.DIAGNOSTIC,
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
-        value_fn=lambda data: data.energy_today.lowest_price_tomorrow,
+        value_fn=lambda data: data.index.lowest_price_tomorrow,
     ),
     SpotHintaSensorEntityDescription(
         key="highest_price_time_today",
@@ -112,7 +134,7 @@ SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
         service_type="energy",
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.TIMESTAMP,
-        value_fn=lambda data: data.energy_today.highest_price_time_today,
+        value_fn=lambda data: data.index.highest_price_time_today,
     ),
     SpotHintaSensorEntityDescription(
         key="highest_price_time_tomorrow",
@@ -120,7 +142,7 @@ SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
         service_type="energy",
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.TIMESTAMP,
-        value_fn=lambda data: data.energy_today.highest_price_time_tomorrow,
+        value_fn=lambda data: data.index.highest_price_time_tomorrow,
     ),
     SpotHintaSensorEntityDescription(
         key="lowest_price_time_today",
@@ -128,7 +150,7 @@ SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
         service_type="energy",
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.TIMESTAMP,
-        value_fn=lambda data: data.energy_today.lowest_price_time_today,
+        value_fn=lambda data: data.index.lowest_price_time_today,
     ),
     SpotHintaSensorEntityDescription(
         key="lowest_price_time_tomorrow",
@@ -136,19 +158,320 @@ SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
         service_type="energy",
         entity_category=EntityCategory.DIAGNOSTIC,
         device_class=SensorDeviceClass.TIMESTAMP,
-        value_fn=lambda data: data.energy_today.lowest_price_time_tomorrow,
+        value_fn=lambda data: data.index.lowest_price_time_tomorrow,
+    ),
+    SpotHintaSensorEntityDescription(
+        key="price_forecast",
+        name="Price forecast",
+        service_type="energy",
+        entity_registry_enabled_default=False,
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda data: data.index.end,
+        attr_fn=lambda data: data.forecast,
+    ),
+)
+
+
+RANK_SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
+    SpotHintaSensorEntityDescription(
+        key="price_rank_today",
+        name="Price rank - Today",
+        service_type="energy",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data.ranks.rank_today,
+    ),
+    SpotHintaSensorEntityDescription(
+        key="price_percentile_today",
+        name="Price percentile - Today",
+        service_type="energy",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=PERCENTAGE,
+        value_fn=lambda data: data.ranks.percentile_today,
+    ),
+    SpotHintaSensorEntityDescription(
+        key="price_rank_24h",
+        name="Price rank - Next 24h",
+        service_type="energy",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data.ranks.rank_24h,
+    ),
+    SpotHintaSensorEntityDescription(
+        key="price_percentile_24h",
+        name="Price percentile - Next 24h",
+        service_type="energy",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=PERCENTAGE,
+        value_fn=lambda data: data.ranks.percentile_24h,
+    ),
+)
+
+
+def quantile_sensors(percent: int) -> tuple[SpotHintaSensorEntityDescription, ...]:
+    """Return the sensors for a quantile of the prices."""
+    return (
+        SpotHintaSensorEntityDescription(
+            key=f"price_p{percent}_today",
+            name=f"Price p{percent} - Today",
+            service_type="energy",
+            entity_category=EntityCategory.DIAGNOSTIC,
+            entity_registry_enabled_default=False,
+            native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+            value_fn=lambda data: data.ranks.quantile(percent),
+        ),
+        SpotHintaSensorEntityDescription(
+            key=f"price_p{percent}_tomorrow",
+            name=f"Price p{percent} - Tomorrow",
+            service_type="energy",
+            entity_category=EntityCategory.DIAGNOSTIC,
+            entity_registry_enabled_default=False,
+            native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+            value_fn=lambda data: data.ranks.quantile(percent, 1),
+        ),
+        SpotHintaSensorEntityDescription(
+            key=f"price_p{percent}_24h",
+            name=f"Price p{percent} - Next 24h",
+            service_type="energy",
+            entity_category=EntityCategory.DIAGNOSTIC,
+            entity_registry_enabled_default=False,
+            native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+            value_fn=lambda data: data.ranks.quantile_24h(percent),
+        ),
+    )
+
+
+QUANTILE_SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = tuple(
+    description
+    for percent in PRICE_QUANTILES
+    for description in quantile_sensors(percent)
+)
+
+
+def _hours_label(hours: int) -> str:
+    """Return a name for a number of hours, in days if they are whole."""
+    return f"{hours // 24} days" if hours > 24 and hours % 24 == 0 else f"{hours}h"
+
+
+def rolling_average_sensor(hours: int) -> SpotHintaSensorEntityDescription:
+    """Return the sensor for the rolling average of the past hours."""
+    return SpotHintaSensorEntityDescription(
+        key=f"average_price_past_{hours}h",
+        name=f"Average - Past {_hours_label(hours)}",
+        service_type="energy",
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+        value_fn=lambda data: (
+            data.rolling.average(hours) if data.rolling is not None else None
+        ),
+    )
+
+
+def horizon_sensors(hours: int) -> tuple[SpotHintaSensorEntityDescription, ...]:
+    """Return the sensors for the price range of the coming hours."""
+    return (
+        SpotHintaSensorEntityDescription(
+            key=f"max_price_next_{hours}h",
+            name=f"Highest price - Next {_hours_label(hours)}",
+            service_type="energy",
+            entity_category=EntityCategory.DIAGNOSTIC,
+            native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+            value_fn=lambda data: (
+                data.rolling.highest(hours) if data.rolling is not None else None
+            ),
+        ),
+        SpotHintaSensorEntityDescription(
+            key=f"min_price_next_{hours}h",
+            name=f"Lowest price - Next {_hours_label(hours)}",
+            service_type="energy",
+            entity_category=EntityCategory.DIAGNOSTIC,
+            native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+            value_fn=lambda data: (
+                data.rolling.lowest(hours) if data.rolling is not None else None
+            ),
+        ),
+    )
+
+
+ROLLING_SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
+    *(rolling_average_sensor(hours) for hours in ROLLING_AVERAGE_HOURS),
+    *(
+        description
+        for hours in HORIZON_HOURS
+        for description in horizon_sensors(hours)
     ),
 )
 
 
+STORAGE_SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
+    SpotHintaSensorEntityDescription(
+        key="storage_action",
+        name="Battery action",
+        service_type="energy",
+        device_class=SensorDeviceClass.ENUM,
+        options=ACTIONS,
+        value_fn=lambda data: (
+            data.storage.action_at(dt_util.utcnow())
+            if data.storage is not None
+            else None
+        ),
+        attr_fn=lambda data: (
+            data.storage.as_dict() if data.storage is not None else None
+        ),
+    ),
+    SpotHintaSensorEntityDescription(
+        key="storage_energy",
+        name="Battery energy",
+        service_type="energy",
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        value_fn=lambda data: (
+            data.storage.energy_at(dt_util.utcnow())
+            if data.storage is not None
+            else None
+        ),
+    ),
+    SpotHintaSensorEntityDescription(
+        key="storage_profit",
+        name="Battery expected profit",
+        service_type="energy",
+        native_unit_of_measurement=CURRENCY_EURO,
+        value_fn=lambda data: (
+            data.storage.profit if data.storage is not None else None
+        ),
+    ),
+)
+
+
+def total_sensor(
+    description: SpotHintaSensorEntityDescription,
+) -> SpotHintaSensorEntityDescription:
+    """Return the total price sensor for a spot price sensor."""
+    name = str(description.name)
+    return replace(
+        description,
+        key=f"total_{description.key}",
+        name=f"Total {name[0].lower()}{name[1:]}",
+        value_fn=lambda data: (
+            description.value_fn(data.total) if data.total is not None else None
+        ),
+        attr_fn=lambda data: (
+            description.attr_fn(data.total) if data.total is not None else None
+        ),
+    )
+
+
+TOTAL_SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = tuple(
+    total_sensor(description) for description in SENSORS
+)
+
+
+def metric_sensors(
+    metric: str, name: str
+) -> tuple[SpotHintaSensorEntityDescription, ...]:
+    """Return the p50 and p95 sensors for a hot path metric."""
+
+    def metric_sensor(percent: int) -> SpotHintaSensorEntityDescription:
+        return SpotHintaSensorEntityDescription(
+            key=f"{metric}_p{percent}",
+            name=f"{name} - p{percent}",
+            service_type="energy",
+            entity_category=EntityCategory.DIAGNOSTIC,
+            entity_registry_enabled_default=False,
+            device_class=SensorDeviceClass.DURATION,
+            state_class=SensorStateClass.MEASUREMENT,
+            native_unit_of_measurement=UnitOfTime.SECONDS,
+            value_fn=lambda data: data.metrics.percentile(metric, percent),
+        )
+
+    return (metric_sensor(50), metric_sensor(95))
+
+
+METRIC_SENSORS: tuple[SpotHintaSensorEntityDescription, ...] = (
+    *metric_sensors(FETCH_DURATION, "Fetch duration"),
+    *metric_sensors(INDEX_DURATION, "Index duration"),
+    *metric_sensors(PUBLICATION_DELAY, "Publication delay"),
+    *metric_sensors(SCHEDULE_DRIFT, "Update drift"),
+    SpotHintaSensorEntityDescription(
+        key=PAYLOAD_SIZE,
+        name="Fetch payload size",
+        service_type="energy",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data.metrics.latest(PAYLOAD_SIZE),
+    ),
+    SpotHintaSensorEntityDescription(
+        key=RETRIES,
+        name="Fetch retries",
+        service_type="energy",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data.metrics.latest(RETRIES),
+    ),
+)
+
+
+def window_sensors(hours: int) -> tuple[SpotHintaSensorEntityDescription, ...]:
+    """Return the sensors for the upcoming price windows of the given length."""
+    duration = timedelta(hours=hours)
+
+    def window_attributes(window: PriceWindow | None) -> dict[str, Any] | None:
+        if window is None:
+            return None
+        return {"end": window.end, "average_price": window.average_price}
+
+    return (
+        SpotHintaSensorEntityDescription(
+            key=f"cheapest_window_{hours}h",
+            name=f"Cheapest {hours}h window",
+            service_type="energy",
+            device_class=SensorDeviceClass.TIMESTAMP,
+            value_fn=lambda data: (
+                window.start
+                if (window := data.windows.upcoming(duration))
+                else None
+            ),
+            attr_fn=lambda data: window_attributes(data.windows.upcoming(duration)),
+        ),
+        SpotHintaSensorEntityDescription(
+            key=f"most_expensive_window_{hours}h",
+            name=f"Most expensive {hours}h window",
+            service_type="energy",
+            device_class=SensorDeviceClass.TIMESTAMP,
+            value_fn=lambda data: (
+                window.start
+                if (window := data.windows.upcoming(duration, highest=True))
+                else None
+            ),
+            attr_fn=lambda data: window_attributes(
+                data.windows.upcoming(duration, highest=True)
+            ),
+        ),
+    )
+
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up Spot-Hinta.fi sensors based on a config entry."""
     coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    descriptions = [
+        *SENSORS,
+        *RANK_SENSORS,
+        *ROLLING_SENSORS,
+        *QUANTILE_SENSORS,
+        *METRIC_SENSORS,
+    ]
+    if coordinator.transform is not None:
+        descriptions.extend(TOTAL_SENSORS)
+    if coordinator.storage is not None:
+        descriptions.extend(STORAGE_SENSORS)
+    for hours in entry.options.get(CONF_WINDOW_HOURS, []):
+        descriptions.extend(window_sensors(int(hours)))
+
     async_add_entities(
         SpotHintaSensorEntity(coordinator=coordinator, description=description)
-        for description in SENSORS
+        for description in descriptions
     )
 
 
@@ -159,6 +482,12 @@ class SpotHintaSensorEntity(
 
     _attr_has_entity_name = True
     _attr_attribution = "Data provided by Spot-Hinta.fi"
+    _attr_native_value: float | str | datetime | None
+    # The price forecast and the battery plan are far too large to be
+    # recorded on every change.
+    _unrecorded_attributes = frozenset(
+        {"start", "interval", "prices", "energy", "state_of_charge"}
+    )
     entity_description: SpotHintaSensorEntityDescription
 
     def __init__(
@@ -184,8 +513,26 @@ class SpotHintaSensorEntity(
             manufacturer="Spot-Hinta.fi",
             name=f"Energy spot prices for {coordinator.region.name}",
         )
+        self._attr_native_value = description.value_fn(coordinator.data)
+        self._attr_extra_state_attributes = (
+            description.attr_fn(coordinator.data) or {}
+        )
+        self._last_available = True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state of the sensor, but only if it has changed."""
+        value = self.entity_description.value_fn(self.coordinator.data)
+        attributes = self.entity_description.attr_fn(self.coordinator.data) or {}
+        available = self.available
+        if (
+            value == self._attr_native_value
+            and attributes == self._attr_extra_state_attributes
+            and available == self._last_available
+        ):
+            return
 
-    @property
-    def native_value(self) -> float | datetime | None:
-        """Return the state of the sensor."""
-        return self.entity_description.value_fn(self.coordinator.data)
+        self._attr_native_value = value
+        self._attr_extra_state_attributes = attributes
+        self._last_available = available
+        self.async_write_ha_state()
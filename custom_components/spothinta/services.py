@@ -0,0 +1,197 @@
+"""Services for the Spot-Hinta.fi integration."""
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+import homeassistant.util.dt as dt_util
+
+from .const import DEFAULT_STORAGE_EFFICIENCY, DOMAIN
+from .coordinator import SpotHintaDataUpdateCoordinator
+from .storage import StorageConfig, plan_storage
+
+SERVICE_FIND_CHEAPEST_WINDOW = "find_cheapest_window"
+SERVICE_PLAN_STORAGE = "plan_storage"
+
+ATTR_CONFIG_ENTRY = "config_entry"
+ATTR_DURATION = "duration"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_CONTIGUOUS = "contiguous"
+ATTR_MOST_EXPENSIVE = "most_expensive"
+ATTR_CAPACITY = "capacity"
+ATTR_POWER = "power"
+ATTR_EFFICIENCY = "efficiency"
+ATTR_STATE_OF_CHARGE = "state_of_charge"
+
+FIND_CHEAPEST_WINDOW_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY): cv.string,
+        vol.Required(ATTR_DURATION): cv.positive_time_period,
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_CONTIGUOUS, default=True): cv.boolean,
+        vol.Optional(ATTR_MOST_EXPENSIVE, default=False): cv.boolean,
+    }
+)
+
+PLAN_STORAGE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY): cv.string,
+        vol.Inclusive(ATTR_CAPACITY, "battery"): vol.All(
+            vol.Coerce(float), vol.Range(min=0, min_included=False)
+        ),
+        vol.Inclusive(ATTR_POWER, "battery"): vol.All(
+            vol.Coerce(float), vol.Range(min=0, min_included=False)
+        ),
+        vol.Optional(ATTR_EFFICIENCY): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=100)
+        ),
+        vol.Optional(ATTR_STATE_OF_CHARGE): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=100)
+        ),
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Set up the services for the Spot-Hinta.fi integration."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FIND_CHEAPEST_WINDOW,
+        _async_find_cheapest_window,
+        schema=FIND_CHEAPEST_WINDOW_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PLAN_STORAGE,
+        _async_plan_storage,
+        schema=PLAN_STORAGE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def get_coordinator(
+    hass: HomeAssistant, entry_id: str
+) -> SpotHintaDataUpdateCoordinator:
+    """Return the coordinator of a loaded config entry."""
+    entry = hass.config_entries.async_get_entry(entry_id)
+    if entry is None or entry.domain != DOMAIN:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="unknown_config_entry",
+            translation_placeholders={"config_entry": entry_id},
+        )
+    if entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="config_entry_not_loaded",
+            translation_placeholders={"config_entry": entry.title},
+        )
+    return hass.data[DOMAIN][entry.entry_id]
+
+
+def _as_aware(moment: datetime) -> datetime:
+    """Interpret naive datetimes in the time zone of Home Assistant."""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=dt_util.get_default_time_zone())
+    return moment
+
+
+async def _async_find_cheapest_window(call: ServiceCall) -> ServiceResponse:
+    """Find the cheapest, or most expensive, price window."""
+    coordinator = get_coordinator(call.hass, call.data[ATTR_CONFIG_ENTRY])
+
+    start = _as_aware(call.data.get(ATTR_START, dt_util.utcnow()))
+    end = call.data.get(ATTR_END)
+    window = coordinator.data.windows.between(
+        start,
+        _as_aware(end) if end is not None else None,
+        call.data[ATTR_DURATION],
+        contiguous=call.data[ATTR_CONTIGUOUS],
+        highest=call.data[ATTR_MOST_EXPENSIVE],
+    )
+    if window is None:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="no_prices_for_window",
+        )
+
+    return {
+        "start": window.start.isoformat(),
+        "end": window.end.isoformat(),
+        "average_price": window.average_price,
+        "intervals": [interval.isoformat() for interval in window.intervals],
+    }
+
+
+async def _async_plan_storage(call: ServiceCall) -> ServiceResponse:
+    """Plan charging and discharging a battery over the known prices.
+
+    The battery configured in the options is used, unless a capacity and a
+    power are given. The efficiency of the configured battery applies to
+    them, unless an efficiency is given too. Without a given state of
+    charge, it is read from the configured sensor, if any.
+    """
+    coordinator = get_coordinator(call.hass, call.data[ATTR_CONFIG_ENTRY])
+
+    storage = coordinator.storage
+    if ATTR_CAPACITY in call.data:
+        storage = StorageConfig(
+            capacity=call.data[ATTR_CAPACITY],
+            power=call.data[ATTR_POWER],
+            efficiency=(
+                storage.efficiency
+                if storage is not None
+                else DEFAULT_STORAGE_EFFICIENCY
+            ),
+            state_of_charge_entity=(
+                storage.state_of_charge_entity if storage is not None else None
+            ),
+        )
+    if storage is None:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="no_storage",
+        )
+    if ATTR_EFFICIENCY in call.data:
+        storage = replace(storage, efficiency=call.data[ATTR_EFFICIENCY])
+
+    if ATTR_STATE_OF_CHARGE in call.data:
+        state_of_charge = storage.capacity * call.data[ATTR_STATE_OF_CHARGE] / 100
+    else:
+        state_of_charge = coordinator.state_of_charge(storage)
+
+    data = coordinator.data
+    start = call.data.get(ATTR_START)
+    end = call.data.get(ATTR_END)
+    plan = plan_storage(
+        data.total.index if data.total is not None else data.index,
+        storage,
+        state_of_charge,
+        _as_aware(start) if start is not None else None,
+        _as_aware(end) if end is not None else None,
+    )
+    if plan is None:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="no_prices_for_storage",
+        )
+
+    return plan.as_dict()
@@ -0,0 +1,106 @@
+"""Prices shared between Home Assistant instances for Spot-Hinta.fi."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from datetime import timedelta
+from functools import partial
+import logging
+from pathlib import Path
+from typing import Any
+
+from spothinta_api import Electricity
+from spothinta_api.const import Region
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.json import save_json
+import homeassistant.util.dt as dt_util
+from homeassistant.util.json import load_json_object
+
+from .cache import async_deserialize_prices, serialize_prices
+from .const import CONF_SHARED_CACHE_PATH, DOMAIN, SHARED_CACHE_TTL, THRESHOLD_HOUR
+from .price_index import PriceIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SharedPriceFile:
+    """Share the fetched prices of a region with other instances.
+
+    Instances at the same site point to the same directory, e.g. on a shared
+    volume. Every fetch is written to a file in the compact form of the
+    price cache, atomically so that readers never see a partial file, and
+    the file is read before fetching. The shared prices are used instead of
+    fetching if they were fetched recently, or already cover tomorrow, so
+    that only one of the instances goes to the API.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        directory: str,
+        region: Region,
+        resolution: timedelta,
+    ) -> None:
+        """Initialize the shared prices of a region and resolution."""
+        self.hass = hass
+        minutes = int(resolution.total_seconds()) // 60
+        self.path = Path(directory) / f"{DOMAIN}_{region.name.lower()}_{minutes}.json"
+
+    @classmethod
+    def from_options(
+        cls,
+        hass: HomeAssistant,
+        options: Mapping[str, Any],
+        region: Region,
+        resolution: timedelta,
+    ) -> SharedPriceFile | None:
+        """Return the shared prices configured in the options, if any."""
+        if not (directory := options.get(CONF_SHARED_CACHE_PATH)):
+            return None
+        return cls(hass, directory, region, resolution)
+
+    async def async_load(self) -> Electricity | None:
+        """Load the shared prices, unless fetching could get newer ones."""
+        try:
+            data: dict[str, Any] = await self.hass.async_add_executor_job(
+                load_json_object, self.path
+            )
+        except HomeAssistantError:
+            _LOGGER.warning("Ignoring unreadable shared prices", exc_info=True)
+            return None
+        if not data:
+            return None
+
+        now = dt_util.utcnow().timestamp()
+        # The prices for tomorrow are published around noon UTC, if the
+        # shared prices cover tomorrow until then, there is nothing newer.
+        refresh = (int(now) // 86400 + 1) * 86400 + THRESHOLD_HOUR * 3600
+        try:
+            if now >= data["expires"] or (
+                now - data["fetched"] >= SHARED_CACHE_TTL.total_seconds()
+                and data["expires"] - data["interval"] < refresh
+            ):
+                return None
+            return await async_deserialize_prices(data)
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.warning("Ignoring invalid shared prices", exc_info=True)
+            return None
+
+    async def async_save(self, energy_prices: Electricity) -> None:
+        """Share freshly fetched prices with the other instances."""
+        if not energy_prices.prices:
+            return
+
+        data = {
+            **serialize_prices(PriceIndex(energy_prices)),
+            "fetched": int(dt_util.utcnow().timestamp()),
+        }
+        try:
+            await self.hass.async_add_executor_job(
+                partial(save_json, str(self.path), data, atomic_writes=True)
+            )
+        except HomeAssistantError:
+            _LOGGER.warning(
+                "Failed to share the prices in %s", self.path, exc_info=True
+            )
@@ -0,0 +1,147 @@
+"""Long-term price statistics for Spot-Hinta.fi."""
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left
+from itertools import groupby
+import logging
+from typing import TYPE_CHECKING
+
+from spothinta_api.const import Region
+
+from homeassistant.const import CURRENCY_EURO, UnitOfEnergy
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN
+from .price_index import PriceIndex
+
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import StatisticData
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = 3600
+
+
+class PriceStatistics:
+    """Import the prices of a region as hourly external statistics.
+
+    Every fetch imports the mean, minimum and maximum price of all complete
+    hours after the last imported one in a single batch. The last imported
+    hour is looked up from the recorder once, so the prices already known
+    when setting up the config entry fill in any hours missed while Home
+    Assistant was not running.
+
+    The recorder is only imported once it is known to be loaded, so it is
+    not imported when loading the integration.
+    """
+
+    def __init__(self, hass: HomeAssistant, region: Region) -> None:
+        """Initialize the price statistics for a region."""
+        self.hass = hass
+        self.region = region
+        self._lock = asyncio.Lock()
+        self._last_hour: dict[str, float | None] = {}
+
+    def statistic_id(self, total: bool = False) -> str:
+        """Return the statistic ID of the spot or total prices."""
+        kind = "total_price" if total else "energy_price"
+        return f"{DOMAIN}:{self.region.name.lower()}_{kind}"
+
+    async def async_import(
+        self, index: PriceIndex, total: PriceIndex | None = None
+    ) -> None:
+        """Import the complete hours that haven't been imported yet."""
+        if "recorder" not in self.hass.config.components:
+            return
+
+        async with self._lock:
+            await self._async_import(index, total=False)
+            if total is not None:
+                await self._async_import(total, total=True)
+
+    async def _async_import(self, index: PriceIndex, *, total: bool) -> None:
+        """Import the complete hours of an index as one batch."""
+        # pylint: disable=import-outside-toplevel
+        from homeassistant.components.recorder.models import (
+            StatisticMeanType,
+            StatisticMetaData,
+        )
+        from homeassistant.components.recorder.statistics import (
+            async_add_external_statistics,
+        )
+
+        statistic_id = self.statistic_id(total)
+        if statistic_id not in self._last_hour:
+            self._last_hour[statistic_id] = await self._async_get_last_hour(
+                statistic_id
+            )
+
+        statistics = hourly_statistics(index, self._last_hour[statistic_id])
+        if not statistics:
+            return
+
+        kind = "total price" if total else "energy price"
+        async_add_external_statistics(
+            self.hass,
+            StatisticMetaData(
+                mean_type=StatisticMeanType.ARITHMETIC,
+                has_sum=False,
+                name=f"Spot-Hinta.fi {self.region.name} {kind}",
+                source=DOMAIN,
+                statistic_id=statistic_id,
+                unit_class=None,
+                unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+            ),
+            statistics,
+        )
+        self._last_hour[statistic_id] = statistics[-1]["start"].timestamp()
+        _LOGGER.debug(
+            "Imported %s hours of statistics for %s", len(statistics), statistic_id
+        )
+
+    async def _async_get_last_hour(self, statistic_id: str) -> float | None:
+        """Return the start of the last imported hour, if any."""
+        # pylint: disable=import-outside-toplevel
+        from homeassistant.components.recorder import get_instance
+        from homeassistant.components.recorder.statistics import (
+            get_last_statistics,
+        )
+
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic_id, True, set()
+        )
+        if not (rows := last.get(statistic_id)):
+            return None
+        return rows[0]["start"]
+
+
+def hourly_statistics(
+    index: PriceIndex, after: float | None = None
+) -> list[StatisticData]:
+    """Return the statistics of the complete hours after the given hour."""
+    timestamps = index.timestamps
+    prices = index.prices
+    per_hour = max(1, HOUR // index.interval)
+    start = 0 if after is None else bisect_left(timestamps, after + HOUR)
+
+    statistics: list[StatisticData] = []
+    for hour, positions in groupby(
+        range(start, len(timestamps)),
+        key=lambda position: timestamps[position] - timestamps[position] % HOUR,
+    ):
+        hour_prices = [prices[position] for position in positions]
+        if len(hour_prices) != per_hour:
+            continue
+
+        statistics.append(
+            {
+                "start": dt_util.utc_from_timestamp(hour),
+                "mean": round(sum(hour_prices) / per_hour, 5),
+                "min": round(min(hour_prices), 5),
+                "max": round(max(hour_prices), 5),
+            }
+        )
+
+    return statistics
@@ -0,0 +1,240 @@
+"""Battery storage arbitrage planning for Spot-Hinta.fi."""
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from math import floor
+from typing import Any, NamedTuple
+
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    CONF_STORAGE_CAPACITY,
+    CONF_STORAGE_EFFICIENCY,
+    CONF_STORAGE_POWER,
+    CONF_STORAGE_SOC_ENTITY,
+    DEFAULT_STORAGE_EFFICIENCY,
+    STORAGE_MAX_LEVELS,
+    STORAGE_POWER_STEPS,
+)
+from .price_index import PriceIndex
+
+ACTION_CHARGE = "charge"
+ACTION_DISCHARGE = "discharge"
+ACTION_IDLE = "idle"
+ACTIONS = [ACTION_CHARGE, ACTION_DISCHARGE, ACTION_IDLE]
+
+
+@dataclass(frozen=True)
+class StorageConfig:
+    """A battery that can be charged and discharged at the spot prices.
+
+    The capacity is in kWh and the power limit in kW, for both charging and
+    discharging. All losses of the round-trip efficiency, in percent, are
+    accounted for when charging. The state of charge of the battery, in
+    percent, is optionally read from a sensor when planning.
+    """
+
+    capacity: float
+    power: float
+    efficiency: float = DEFAULT_STORAGE_EFFICIENCY
+    state_of_charge_entity: str | None = None
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> StorageConfig | None:
+        """Return the battery configured in the options, if any."""
+        capacity = float(options.get(CONF_STORAGE_CAPACITY) or 0)
+        power = float(options.get(CONF_STORAGE_POWER) or 0)
+        if capacity <= 0 or power <= 0:
+            return None
+        return cls(
+            capacity=capacity,
+            power=power,
+            efficiency=float(
+                options.get(CONF_STORAGE_EFFICIENCY, DEFAULT_STORAGE_EFFICIENCY)
+            ),
+            state_of_charge_entity=options.get(CONF_STORAGE_SOC_ENTITY),
+        )
+
+
+class StoragePlan(NamedTuple):
+    """The most profitable way to charge and discharge a battery.
+
+    The energy is the energy charged to, or discharged from, the battery in
+    every interval, in kWh. It is positive when charging. The state of
+    charge is the energy stored at the end of every interval.
+    """
+
+    start: int
+    interval: int
+    energy: list[float]
+    state_of_charge: list[float]
+    profit: float
+
+    def _position(self, moment: datetime) -> int | None:
+        """Return the position of the planned interval containing a time."""
+        position = int((moment.timestamp() - self.start) // self.interval)
+        return position if 0 <= position < len(self.energy) else None
+
+    def energy_at(self, moment: datetime) -> float | None:
+        """Return the energy planned for the interval containing a time."""
+        if (position := self._position(moment)) is None:
+            return None
+        return self.energy[position]
+
+    def action_at(self, moment: datetime) -> str | None:
+        """Return whether the battery charges, discharges or idles at a time."""
+        if (energy := self.energy_at(moment)) is None:
+            return None
+        if energy > 0:
+            return ACTION_CHARGE
+        if energy < 0:
+            return ACTION_DISCHARGE
+        return ACTION_IDLE
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the plan in a compact, columnar form."""
+        return {
+            "start": dt_util.utc_from_timestamp(self.start).isoformat(),
+            "interval": self.interval,
+            "energy": self.energy,
+            "state_of_charge": self.state_of_charge,
+            "profit": self.profit,
+        }
+
+
+def plan_storage(
+    index: PriceIndex,
+    storage: StorageConfig,
+    state_of_charge: float = 0.0,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> StoragePlan | None:
+    """Plan charging and discharging a battery over the known prices.
+
+    The state of charge, in kWh, is discretized into levels. The best
+    profit from every interval on is calculated backwards over the levels
+    with dynamic programming, and the plan is then followed forwards from
+    the initial state of charge. The interval running at the start time is
+    included, and the plan ends at the first gap in the prices. Energy left
+    in the battery at the end of the plan has no value, and the battery is
+    not discharged at negative prices.
+
+    The best profit is concave in the state of charge, so in every interval
+    it is best to charge up to one level, or discharge down to another, as
+    far as the power allows, and to stay idle in between. Only these target
+    levels are searched for, which keeps every interval linear in the number
+    of levels.
+    """
+    if (positions := _contiguous_range(index, start, end)) is None:
+        return None
+    first, last = positions
+
+    step, max_delta = _levels(storage, index.interval)
+    top = floor(storage.capacity / step + 1e-9)
+    value, targets = _plan_targets(
+        index.prices[first:last], step, top, max_delta, storage.efficiency / 100
+    )
+
+    level = min(top, max(0, round(state_of_charge / step)))
+    levels = [level, *_follow_targets(targets, level, max_delta)]
+    return StoragePlan(
+        start=index.timestamps[first],
+        interval=index.interval,
+        energy=[
+            round((after - before) * step, 3)
+            for before, after in zip(levels, levels[1:])
+        ],
+        state_of_charge=[round(after * step, 3) for after in levels[1:]],
+        profit=round(value[level], 5),
+    )
+
+
+def _contiguous_range(
+    index: PriceIndex, start: datetime | None, end: datetime | None
+) -> tuple[int, int] | None:
+    """Return the positions to plan over, up to the first gap in the prices."""
+    first = index.position_ending_after(start or dt_util.utcnow())
+    last = len(index) if end is None else index.position_ending_after(end)
+    timestamps = index.timestamps
+    for position in range(first + 1, last):
+        if timestamps[position] - timestamps[position - 1] != index.interval:
+            last = position
+            break
+    if first >= last:
+        return None
+    return first, last
+
+
+def _plan_targets(
+    prices: Sequence[float],
+    step: float,
+    top: int,
+    max_delta: int,
+    efficiency: float,
+) -> tuple[list[float], list[tuple[int, int]]]:
+    """Return the best profits and the target levels, backwards over time.
+
+    The best profit is from the first interval on, for every level stored at
+    its start. The target levels of every interval are the level to charge
+    up to and the level to discharge down to.
+    """
+    # The best profit from the current interval on, for every level stored
+    # at its start.
+    value = [0.0] * (top + 1)
+    targets: list[tuple[int, int]] = []
+    for price in reversed(prices):
+        cost = step * price / efficiency
+        gain = step * price
+        # The value of storing one more level, at every level.
+        marginals = [upper - lower for lower, upper in zip(value, value[1:])]
+        charge_to = next(
+            (level for level, marginal in enumerate(marginals) if marginal <= cost),
+            top,
+        )
+        discharge_to = top
+        if price >= 0:
+            discharge_to = next(
+                (level for level, marginal in enumerate(marginals) if marginal < gain),
+                top,
+            )
+        targets.append((charge_to, discharge_to))
+
+        value = [
+            value[target] - (target - level) * cost
+            if (target := _target(level, charge_to, discharge_to, max_delta)) > level
+            else value[target] + (level - target) * gain
+            for level in range(top + 1)
+        ]
+    targets.reverse()
+    return value, targets
+
+
+def _follow_targets(
+    targets: list[tuple[int, int]], level: int, max_delta: int
+) -> list[int]:
+    """Return the level stored at the end of every interval of the plan."""
+    levels = []
+    for charge_to, discharge_to in targets:
+        level = _target(level, charge_to, discharge_to, max_delta)
+        levels.append(level)
+    return levels
+
+
+def _levels(storage: StorageConfig, interval: int) -> tuple[float, int]:
+    """Return the energy of a level and the most levels moved per interval."""
+    per_interval = storage.power * interval / 3600
+    step = per_interval / STORAGE_POWER_STEPS
+    if storage.capacity / step + 1 > STORAGE_MAX_LEVELS:
+        step = storage.capacity / (STORAGE_MAX_LEVELS - 1)
+    return step, max(1, floor(per_interval / step + 1e-9))
+
+
+def _target(level: int, charge_to: int, discharge_to: int, max_delta: int) -> int:
+    """Return the level to move to from a level, within the power limit."""
+    if level < charge_to:
+        return min(level + max_delta, charge_to)
+    if level > discharge_to:
+        return max(level - max_delta, discharge_to)
+    return level
@@ -0,0 +1,144 @@
+"""Price threshold crossings for Spot-Hinta.fi."""
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections.abc import Callable
+from datetime import datetime
+from typing import NamedTuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+import homeassistant.util.dt as dt_util
+
+from .price_index import PriceIndex
+
+
+class Threshold(NamedTuple):
+    """A condition on the price of an interval.
+
+    The condition holds if the price is below or above the given price, or
+    if the price is among the given number of cheapest prices of its day.
+    """
+
+    below: float | None = None
+    above: float | None = None
+    rank: int | None = None
+
+    def matches(self, index: PriceIndex, position: int) -> bool:
+        """Return true if the price at a position meets the condition."""
+        price = index.prices[position]
+        if self.below is not None and not price < self.below:
+            return False
+        if self.above is not None and not price > self.above:
+            return False
+        if self.rank is not None and not 0 < index.ranks[position] <= self.rank:
+            return False
+        return True
+
+
+class Crossings(NamedTuple):
+    """The times a threshold is crossed, and the state after each crossing."""
+
+    times: list[int]
+    states: list[bool]
+
+    def state_at(self, moment: datetime) -> bool:
+        """Return if the condition holds at the given time."""
+        position = bisect_right(self.times, moment.timestamp()) - 1
+        return position >= 0 and self.states[position]
+
+    def next_after(self, moment: datetime) -> int | None:
+        """Return the position of the first crossing after the given time."""
+        position = bisect_right(self.times, moment.timestamp())
+        return position if position < len(self.times) else None
+
+
+def threshold_crossings(index: PriceIndex, threshold: Threshold) -> Crossings:
+    """Return every time the condition changes in the indexed prices.
+
+    The condition never holds where there are no prices, so the last known
+    interval, and any interval followed by a gap, ends with a crossing to
+    false if the condition held.
+    """
+    times: list[int] = []
+    states: list[bool] = []
+    interval = index.interval
+    state = False
+    end = 0
+
+    for position, timestamp in enumerate(index.timestamps):
+        if state and end != timestamp:
+            times.append(end)
+            states.append(False)
+            state = False
+
+        if (matches := threshold.matches(index, position)) != state:
+            times.append(timestamp)
+            states.append(matches)
+            state = matches
+        end = timestamp + interval
+
+    if state:
+        times.append(end)
+        states.append(False)
+
+    return Crossings(times, states)
+
+
+class CrossingTracker:
+    """Follow the crossings of a threshold with one scheduled callback.
+
+    The crossings are calculated once for every fetch. Only the next
+    upcoming crossing is scheduled, and the action is called with the new
+    state when it is reached.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        threshold: Threshold,
+        action: Callable[[bool], None],
+    ) -> None:
+        """Initialize the crossing tracker."""
+        self.hass = hass
+        self.threshold = threshold
+        self.is_on = False
+        self._action = action
+        self._crossings = Crossings([], [])
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_set_index(self, index: PriceIndex) -> None:
+        """Calculate the crossings for new prices and schedule the next one."""
+        self._crossings = threshold_crossings(index, self.threshold)
+        now = dt_util.utcnow()
+        self.is_on = self._crossings.state_at(now)
+        self._async_schedule(now)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel the scheduled crossing."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    @callback
+    def _async_schedule(self, now: datetime) -> None:
+        """Schedule the first crossing after the given time."""
+        self.async_cancel()
+        if (position := self._crossings.next_after(now)) is None:
+            return
+
+        self._unsub = async_track_point_in_time(
+            self.hass,
+            self._async_crossed,
+            dt_util.utc_from_timestamp(self._crossings.times[position]),
+        )
+
+    @callback
+    def _async_crossed(self, now: datetime) -> None:
+        """Handle reaching a crossing."""
+        self._unsub = None
+        self.is_on = self._crossings.state_at(now)
+        self._async_schedule(now)
+        self._action(self.is_on)
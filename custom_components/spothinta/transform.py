@@ -0,0 +1,100 @@
+"""Total price transformation for Spot-Hinta.fi energy prices."""
+from __future__ import annotations
+
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    CONF_MARGIN,
+    CONF_TRANSFER_DAY,
+    CONF_TRANSFER_NIGHT,
+    CONF_TRANSFER_WINTER_DAY,
+    CONF_VAT,
+    NIGHT_END_HOUR,
+    NIGHT_START_HOUR,
+    WINTER_MONTHS,
+)
+from .price_index import PriceIndex
+
+
+@dataclass(frozen=True)
+class PriceTransform:
+    """Turn spot prices into total prices, including fees and VAT.
+
+    The spot prices from spot-hinta.fi already include VAT. The margin and
+    the transfer fees are configured in EUR/kWh without VAT, which is added
+    on top of them. The transfer fee depends on the local time: the night
+    fee applies every night, and the optional winter day fee applies on
+    winter days from Monday to Saturday.
+    """
+
+    vat: float = 0.0
+    margin: float = 0.0
+    transfer_day: float = 0.0
+    transfer_night: float = 0.0
+    transfer_winter_day: float | None = None
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> PriceTransform | None:
+        """Return the transform configured in the options, if any."""
+        transform = cls(
+            vat=float(options.get(CONF_VAT, 0)),
+            margin=float(options.get(CONF_MARGIN, 0)),
+            transfer_day=float(options.get(CONF_TRANSFER_DAY, 0)),
+            transfer_night=float(options.get(CONF_TRANSFER_NIGHT, 0)),
+            transfer_winter_day=(
+                float(winter_day)
+                if (winter_day := options.get(CONF_TRANSFER_WINTER_DAY)) is not None
+                else None
+            ),
+        )
+        if transform == cls():
+            return None
+        return transform
+
+    def apply(self, index: PriceIndex) -> PriceIndex:
+        """Return an index over the total prices of the indexed intervals.
+
+        The fees only change on whole hours, so they are calculated once per
+        hour and added to the prices of all intervals in that hour.
+        """
+        factor = 1 + self.vat / 100
+        time_zone = index.time_zone
+        fees: dict[int, float] = {}
+
+        def fee(timestamp: int) -> float:
+            hour = timestamp - timestamp % 3600
+            if (hour_fee := fees.get(hour)) is None:
+                local = dt_util.utc_from_timestamp(hour).astimezone(time_zone)
+                hour_fee = self.margin + self._transfer_fee(local)
+                hour_fee = fees[hour] = hour_fee * factor
+            return hour_fee
+
+        return index.with_prices(
+            array(
+                "d",
+                (
+                    price + fee(timestamp)
+                    for timestamp, price in zip(
+                        index.timestamps, index.prices, strict=True
+                    )
+                ),
+            )
+        )
+
+    def _transfer_fee(self, local: datetime) -> float:
+        """Return the transfer fee at a local time."""
+        if local.hour >= NIGHT_START_HOUR or local.hour < NIGHT_END_HOUR:
+            return self.transfer_night
+        if (
+            self.transfer_winter_day is not None
+            and local.month in WINTER_MONTHS
+            and local.weekday() < 6
+        ):
+            return self.transfer_winter_day
+        return self.transfer_day
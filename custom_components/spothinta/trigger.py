@@ -0,0 +1,106 @@
+"""Offer Spot-Hinta.fi price based automation rules."""
+from __future__ import annotations
+
+import voluptuous as vol
+
+from homeassistant.const import CONF_ABOVE, CONF_BELOW, CONF_PLATFORM
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.trigger import TriggerActionType, TriggerInfo
+from homeassistant.helpers.typing import ConfigType
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN, SIGNAL_PRICES_UPDATED
+from .coordinator import SpotHintaData, SpotHintaDataUpdateCoordinator
+from .thresholds import CrossingTracker, Threshold
+
+CONF_CONFIG_ENTRY = "config_entry"
+CONF_RANK = "rank"
+
+TRIGGER_SCHEMA = vol.All(
+    cv.TRIGGER_BASE_SCHEMA.extend(
+        {
+            vol.Required(CONF_PLATFORM): DOMAIN,
+            vol.Required(CONF_CONFIG_ENTRY): cv.string,
+            vol.Optional(CONF_BELOW): vol.Coerce(float),
+            vol.Optional(CONF_ABOVE): vol.Coerce(float),
+            vol.Optional(CONF_RANK): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        }
+    ),
+    cv.has_at_least_one_key(CONF_BELOW, CONF_ABOVE, CONF_RANK),
+)
+
+
+async def async_attach_trigger(
+    hass: HomeAssistant,
+    config: ConfigType,
+    action: TriggerActionType,
+    trigger_info: TriggerInfo,
+) -> CALLBACK_TYPE:
+    """Trigger when the price starts to meet the configured condition.
+
+    The crossings are calculated once for every fetch, and only the next
+    upcoming one is scheduled.
+    """
+    trigger_data = trigger_info["trigger_data"]
+    entry_id: str = config[CONF_CONFIG_ENTRY]
+    threshold = Threshold(
+        below=config.get(CONF_BELOW),
+        above=config.get(CONF_ABOVE),
+        rank=config.get(CONF_RANK),
+    )
+    job = HassJob(action)
+    current: SpotHintaData | None = None
+
+    @callback
+    def crossed(is_on: bool) -> None:
+        """Call the action when the condition starts to hold."""
+        if not is_on or current is None:
+            return
+
+        now = dt_util.utcnow()
+        hass.async_run_hass_job(
+            job,
+            {
+                "trigger": {
+                    **trigger_data,
+                    "platform": DOMAIN,
+                    "config_entry": entry_id,
+                    "below": threshold.below,
+                    "above": threshold.above,
+                    "rank": threshold.rank,
+                    "price": current.index.price_at_time(now),
+                    "price_rank": current.index.rank_at_time(now),
+                    "description": "Spot-Hinta.fi price threshold",
+                }
+            },
+        )
+
+    tracker = CrossingTracker(hass, threshold, crossed)
+
+    @callback
+    def prices_updated(data: SpotHintaData) -> None:
+        """Calculate the crossings for new prices."""
+        nonlocal current
+        current = data
+        tracker.async_set_index(data.index)
+
+    unsub = async_dispatcher_connect(
+        hass, SIGNAL_PRICES_UPDATED.format(entry_id), prices_updated
+    )
+
+    # The config entry may be set up before or after the automation.
+    coordinator: SpotHintaDataUpdateCoordinator | None = hass.data.get(
+        DOMAIN, {}
+    ).get(entry_id)
+    if coordinator is not None and coordinator.data is not None:
+        prices_updated(coordinator.data)
+
+    @callback
+    def async_remove() -> None:
+        """Detach the trigger."""
+        unsub()
+        tracker.async_cancel()
+
+    return async_remove
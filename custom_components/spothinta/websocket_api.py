@@ -0,0 +1,159 @@
+"""Websocket API for Spot-Hinta.fi."""
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN, SIGNAL_UNLOADED
+from .coordinator import SpotHintaDataUpdateCoordinator
+from .services import get_coordinator
+
+ATTR_CONFIG_ENTRY = "config_entry"
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Set up the websocket API for the Spot-Hinta.fi integration."""
+    websocket_api.async_register_command(hass, ws_subscribe_prices)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "spothinta/subscribe_prices",
+        vol.Required(ATTR_CONFIG_ENTRY): str,
+    }
+)
+@callback
+def ws_subscribe_prices(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Subscribe to the price curve of a region.
+
+    The whole curve is sent once, in the compact form of the price forecast
+    sensor, with the position of the current interval in it. After that,
+    only the prices of new intervals are sent once they are fetched, with
+    their position in the curve, and the position of the current interval
+    when a new interval starts. The whole curve is sent again if the fetched
+    prices don't continue it, e.g. once the day has changed.
+    """
+    # Only subscribe to config entries that are loaded.
+    get_coordinator(hass, msg[ATTR_CONFIG_ENTRY])
+    subscription = PriceSubscription(
+        hass, connection, msg["id"], msg[ATTR_CONFIG_ENTRY]
+    )
+    connection.subscriptions[msg["id"]] = subscription.async_start()
+    connection.send_result(msg["id"])
+    subscription.async_update()
+
+
+class PriceSubscription:
+    """Send the changes of the price curve of a region to a subscriber.
+
+    The coordinator is looked up through the config entry, and the
+    subscription ends when the config entry is unloaded, e.g. to apply new
+    options. The forecast of the coordinator data is rebuilt on every fetch
+    that changes the prices, so comparing it by identity is enough to tell
+    if there is anything new to send.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        connection: websocket_api.ActiveConnection,
+        msg_id: int,
+        entry_id: str,
+    ) -> None:
+        """Initialize a subscription that has not been sent anything yet."""
+        self._hass = hass
+        self._connection = connection
+        self._msg_id = msg_id
+        self._entry_id = entry_id
+        self._unsubscribe: list[CALLBACK_TYPE] = []
+        self._forecast: dict[str, Any] | None = None
+        self._current: int | None = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Listen to the coordinator of the config entry until it is unloaded."""
+        coordinator: SpotHintaDataUpdateCoordinator = self._hass.data[DOMAIN][
+            self._entry_id
+        ]
+        self._unsubscribe = [
+            coordinator.async_add_listener(self.async_update),
+            async_dispatcher_connect(
+                self._hass, SIGNAL_UNLOADED.format(self._entry_id), self._async_end
+            ),
+        ]
+        return self.async_stop
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop listening to the coordinator."""
+        while self._unsubscribe:
+            self._unsubscribe.pop()()
+
+    @callback
+    def _async_end(self) -> None:
+        """End the subscription once the config entry is unloaded."""
+        self.async_stop()
+        self._connection.subscriptions.pop(self._msg_id, None)
+
+    @callback
+    def async_update(self) -> None:
+        """Send what has changed since the last update."""
+        coordinator: SpotHintaDataUpdateCoordinator | None = self._hass.data[
+            DOMAIN
+        ].get(self._entry_id)
+        if coordinator is None:
+            return
+        data = coordinator.data
+        forecast = data.forecast
+        if not forecast:
+            return
+
+        event: dict[str, Any] = {}
+        if forecast is not self._forecast:
+            total = data.total.forecast if data.total is not None else None
+            previous = self._forecast
+            if (
+                previous is not None
+                and previous["start"] == forecast["start"]
+                and previous["interval"] == forecast["interval"]
+                and len(previous["prices"]) <= len(forecast["prices"])
+            ):
+                offset = len(previous["prices"])
+                if offset < len(forecast["prices"]):
+                    event["offset"] = offset
+                    event["prices"] = forecast["prices"][offset:]
+                    if total:
+                        event["total_prices"] = total["prices"][offset:]
+            else:
+                event = {
+                    "start": forecast["start"],
+                    "interval": forecast["interval"],
+                    "prices": forecast["prices"],
+                }
+                if total:
+                    event["total_prices"] = total["prices"]
+                self._current = None
+            self._forecast = forecast
+
+        current = int(
+            (dt_util.utcnow().timestamp() - forecast["start"]) // forecast["interval"]
+        )
+        if current != self._current:
+            event["current"] = current
+            self._current = current
+
+        if event:
+            self._connection.send_message(
+                websocket_api.event_message(self._msg_id, event)
+            )
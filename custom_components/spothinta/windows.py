@@ -0,0 +1,129 @@
+"""Cheapest and most expensive price windows for Spot-Hinta.fi."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import heapq
+from math import ceil
+from typing import NamedTuple
+
+import homeassistant.util.dt as dt_util
+
+from .price_index import PriceIndex
+
+MAX_CACHED_WINDOWS = 128
+
+
+class PriceWindow(NamedTuple):
+    """A set of price intervals and their average price."""
+
+    start: datetime
+    end: datetime
+    average_price: float
+    intervals: tuple[datetime, ...]
+
+
+class WindowFinder:
+    """Find the cheapest or most expensive intervals in the indexed prices.
+
+    A new finder is created for every fetch, so the memoized results are
+    only thrown away when the prices change.
+    """
+
+    def __init__(self, index: PriceIndex) -> None:
+        """Initialize the window finder."""
+        self._index = index
+        self._cache: dict[tuple[int, int, int, bool, bool], PriceWindow | None] = {}
+
+    def upcoming(
+        self, duration: timedelta, *, highest: bool = False
+    ) -> PriceWindow | None:
+        """Return the contiguous window from now until the last known price."""
+        return self.between(dt_util.utcnow(), None, duration, highest=highest)
+
+    def between(
+        self,
+        start: datetime,
+        end: datetime | None,
+        duration: timedelta,
+        *,
+        contiguous: bool = True,
+        highest: bool = False,
+    ) -> PriceWindow | None:
+        """Return the cheapest, or most expensive, intervals between two times.
+
+        The interval running at the start time is included. If `contiguous`
+        is false, the intervals don't have to be next to each other.
+        """
+        index = self._index
+        first = index.position_ending_after(start)
+        last = len(index) if end is None else index.position_ending_after(end)
+        intervals = max(1, ceil(duration / index.resolution))
+
+        key = (first, last, intervals, contiguous, highest)
+        if key not in self._cache:
+            if len(self._cache) >= MAX_CACHED_WINDOWS:
+                self._cache.clear()
+            if contiguous:
+                self._cache[key] = self._contiguous(first, last, intervals, highest)
+            else:
+                self._cache[key] = self._scattered(first, last, intervals, highest)
+        return self._cache[key]
+
+    def _contiguous(
+        self, first: int, last: int, intervals: int, highest: bool
+    ) -> PriceWindow | None:
+        """Find the best window of adjacent intervals using a sliding sum."""
+        timestamps = self._index.timestamps
+        prices = self._index.prices
+        span = (intervals - 1) * self._index.interval
+
+        if last - first < intervals:
+            return None
+
+        best: int | None = None
+        best_sum = 0.0
+        window_sum = sum(prices[first : first + intervals])
+        for position in range(first, last - intervals + 1):
+            if position > first:
+                window_sum += prices[position + intervals - 1] - prices[position - 1]
+            # Skip windows spanning a gap in the prices.
+            if timestamps[position + intervals - 1] - timestamps[position] != span:
+                continue
+            if (
+                best is None
+                or (highest and window_sum > best_sum)
+                or (not highest and window_sum < best_sum)
+            ):
+                best = position
+                best_sum = window_sum
+
+        if best is None:
+            return None
+        return self._window(range(best, best + intervals))
+
+    def _scattered(
+        self, first: int, last: int, intervals: int, highest: bool
+    ) -> PriceWindow | None:
+        """Find the best intervals, not necessarily adjacent, using a heap."""
+        if last - first < intervals:
+            return None
+
+        select = heapq.nlargest if highest else heapq.nsmallest
+        positions = select(
+            intervals, range(first, last), key=self._index.prices.__getitem__
+        )
+        return self._window(sorted(positions))
+
+    def _window(self, positions: range | list[int]) -> PriceWindow:
+        """Return the price window for the given sorted positions."""
+        index = self._index
+        return PriceWindow(
+            start=index.time_at(positions[0]),
+            end=index.time_at(positions[-1]) + index.resolution,
+            average_price=round(
+                sum(index.prices[position] for position in positions)
+                / len(positions),
+                5,
+            ),
+            intervals=tuple(index.time_at(position) for position in positions),
+        )
@@ -0,0 +1,122 @@
+"""Fixtures for Spot-Hinta.fi tests."""
+from __future__ import annotations
+
+from collections.abc import Generator
+from datetime import datetime, time, timedelta
+from math import sin
+from typing import Any
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from spothinta_api import Electricity
+from spothinta_api.const import Region
+
+from custom_components.spothinta.const import DOMAIN
+from homeassistant.const import CONF_REGION
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+TIME_ZONE = ZoneInfo("Europe/Helsinki")
+
+
+def make_electricity(
+    days: int = 2,
+    resolution: timedelta = timedelta(minutes=15),
+    start: datetime | None = None,
+) -> Electricity:
+    """Return synthetic prices for the given number of days, starting today."""
+    if start is None:
+        start = datetime.combine(
+            dt_util.now(TIME_ZONE).date(), time(), tzinfo=TIME_ZONE
+        )
+    start = dt_util.as_utc(start)
+
+    count = int(timedelta(days=days) / resolution)
+    return Electricity(
+        prices={
+            start + position * resolution: round(
+                10 + 8 * sin(position / 11) + (position * 7919 % 13) / 10, 5
+            )
+            for position in range(count)
+        },
+        resolution=resolution,
+        time_zone=TIME_ZONE,
+    )
+
+
+class FakeSpotHinta:
+    """Stand-in for the spot-hinta.fi client returning synthetic prices."""
+
+    def __init__(
+        self, days: int = 2, resolution: timedelta = timedelta(minutes=15)
+    ) -> None:
+        """Initialize the fake client."""
+        self.days = days
+        self.resolution = resolution
+        self.requests = 0
+        self.published_at: datetime | None = None
+        self.error: Exception | None = None
+
+    async def energy_prices(
+        self,
+        region: Region = Region.FI,
+        resolution: timedelta = timedelta(minutes=60),
+    ) -> Electricity:
+        """Return synthetic prices for a region.
+
+        Before `published_at`, the prices for the last day are left out. If
+        `error` is set, it is raised instead.
+        """
+        self.requests += 1
+        if self.error is not None:
+            raise self.error
+        days = self.days
+        if self.published_at is not None and dt_util.utcnow() < self.published_at:
+            days -= 1
+        return make_electricity(days, self.resolution)
+
+    async def close(self) -> None:
+        """Close the fake client."""
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(
+    enable_custom_integrations: None,
+) -> None:
+    """Enable loading the custom integration in all tests."""
+
+
+@pytest.fixture
+def spothinta() -> Generator[FakeSpotHinta]:
+    """Patch the spot-hinta.fi client with a fake one."""
+    client = FakeSpotHinta()
+    with patch(
+        "custom_components.spothinta.fetcher.SpotHinta", return_value=client
+    ):
+        yield client
+
+
+async def setup_regions(
+    hass: HomeAssistant,
+    regions: list[Region],
+    options: dict[str, Any] | None = None,
+) -> list[MockConfigEntry]:
+    """Set up a config entry for every given region, with the given options."""
+    entries = []
+    for region in regions:
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            title=f"Spot-Hinta.fi region {region.name}",
+            unique_id=DOMAIN + region.name,
+            data={CONF_REGION: region.value},
+            options=options or {},
+            version=2,
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        entries.append(entry)
+
+    await hass.async_block_till_done()
+    return entries
@@ -0,0 +1,259 @@
+"""Replay harness for the Spot-Hinta.fi scheduler.
+
+A stand-in for the spot-hinta.fi API serves price payloads in the format of
+the `TodayAndDayForward` endpoint through the aiohttp client session of
+Home Assistant, so the real client and the whole integration are exercised.
+Every region is served the days in its own time zone. The prices for every
+day are held back until their publication time, and requests during an
+outage fail. Time is driven forward with the frozen clock, and the report
+tells how many requests and state writes were needed and how long it took
+to get the prices for tomorrow.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from http import HTTPStatus
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from freezegun.api import FrozenDateTimeFactory
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+    AiohttpClientMockResponse,
+)
+from spothinta_api.const import API_HOST, REGION_TO_TIMEZONE, Region
+from yarl import URL
+
+from custom_components.spothinta.const import DOMAIN
+from custom_components.spothinta.coordinator import SpotHintaDataUpdateCoordinator
+from homeassistant.const import EVENT_STATE_CHANGED, EVENT_STATE_REPORTED
+from homeassistant.core import (
+    Event,
+    EventStateChangedData,
+    EventStateReportedData,
+    HomeAssistant,
+    callback,
+)
+import homeassistant.util.dt as dt_util
+
+from .conftest import TIME_ZONE, make_electricity, setup_regions
+
+API_URL = URL.build(scheme="https", host=API_HOST, path="/TodayAndDayForward")
+DATE_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+
+@dataclass(frozen=True)
+class Outage:
+    """A period when every request to the API fails.
+
+    The requests fail with the given HTTP status, or time out if there is
+    no status.
+    """
+
+    start: datetime
+    end: datetime
+    status: HTTPStatus | None = HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+class ReplayServer:
+    """Stand-in for the spot-hinta.fi API serving recorded payloads."""
+
+    def __init__(
+        self,
+        aioclient_mock: AiohttpClientMocker,
+        publication_time: time = time(12, 7),
+    ) -> None:
+        """Initialize the server and route the API requests to it."""
+        self.publication_time = publication_time
+        self.publications: dict[date, datetime] = {}
+        self.outages: list[Outage] = []
+        self.requests = 0
+        self.failures = 0
+        self._payloads: dict[datetime, dict[str, Any]] = {}
+        aioclient_mock.get(API_URL, side_effect=self._async_handle)
+
+    def add_payload(self, items: Iterable[dict[str, Any]]) -> None:
+        """Add the prices of a recorded payload."""
+        for item in items:
+            moment = datetime.strptime(item["DateTime"], DATE_TIME_FORMAT)
+            self._payloads[moment] = item
+
+    def add_synthetic_days(
+        self, start: date, days: int, resolution: timedelta = timedelta(minutes=15)
+    ) -> None:
+        """Add synthetic prices for the given days in the format of the API."""
+        electricity = make_electricity(
+            days, resolution, datetime.combine(start, time(), tzinfo=TIME_ZONE)
+        )
+        self.add_payload(
+            {
+                "DateTime": moment.astimezone(TIME_ZONE).isoformat(),
+                "PriceWithTax": price,
+            }
+            for moment, price in electricity.prices.items()
+        )
+
+    def published_at(self, day: date) -> datetime:
+        """Return when the prices for a day are published."""
+        if (published_at := self.publications.get(day)) is not None:
+            return published_at
+        return datetime.combine(
+            day - timedelta(days=1), self.publication_time, tzinfo=dt_util.UTC
+        )
+
+    def available_at(self, day: date) -> datetime:
+        """Return when the prices for a day can first be fetched."""
+        available_at = self.published_at(day)
+        for outage in sorted(self.outages, key=lambda outage: outage.start):
+            if outage.start <= available_at < outage.end:
+                available_at = outage.end
+        return available_at
+
+    async def _async_handle(
+        self, method: str, url: URL, data: Any
+    ) -> AiohttpClientMockResponse:
+        """Answer a request for the prices of today and tomorrow."""
+        self.requests += 1
+        now = dt_util.utcnow()
+
+        for outage in self.outages:
+            if outage.start <= now < outage.end:
+                self.failures += 1
+                if outage.status is None:
+                    return AiohttpClientMockResponse(method, url, exc=TimeoutError())
+                return AiohttpClientMockResponse(method, url, status=outage.status)
+
+        # Every region is served the days in its own time zone.
+        time_zone = ZoneInfo(REGION_TO_TIMEZONE[Region[url.query["region"]]])
+        today = dt_util.now(time_zone).date()
+        items = [
+            item
+            for moment, item in sorted(self._payloads.items())
+            if (day := moment.astimezone(time_zone).date())
+            in (today, today + timedelta(days=1))
+            and now >= self.published_at(day)
+        ]
+        return AiohttpClientMockResponse(
+            method, url, json=items, headers={"Content-Type": "application/json"}
+        )
+
+
+@dataclass
+class ReplayReport:
+    """What it took to follow the prices over the replayed days."""
+
+    days: int
+    requests: int = 0
+    failures: int = 0
+    state_writes: int = 0
+    # Writes that did not change the state or the attributes.
+    unchanged_writes: int = 0
+    entity_writes: Counter[str] = field(default_factory=Counter)
+    entities: int = 0
+    latencies: dict[date, timedelta] = field(default_factory=dict)
+
+    @property
+    def requests_per_day(self) -> float:
+        """Return the average number of requests per day."""
+        return self.requests / self.days
+
+    @property
+    def state_writes_per_entity_per_day(self) -> float:
+        """Return the average number of state writes per entity and day."""
+        return self.state_writes / max(self.entities, 1) / self.days
+
+    @property
+    def max_latency(self) -> timedelta:
+        """Return the longest wait from publication to having the prices."""
+        return max(self.latencies.values(), default=timedelta())
+
+
+def record_report(
+    record_property: Callable[[str, object], None], report: ReplayReport
+) -> None:
+    """Record the figures of a replay in the test report."""
+    record_property("requests_per_day", report.requests_per_day)
+    record_property("failures", report.failures)
+    record_property(
+        "state_writes_per_entity_per_day", report.state_writes_per_entity_per_day
+    )
+    record_property(
+        "max_state_writes_per_entity", max(report.entity_writes.values(), default=0)
+    )
+    record_property("unchanged_writes", report.unchanged_writes)
+    record_property("max_latency", report.max_latency.total_seconds())
+
+
+async def async_replay(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    server: ReplayServer,
+    start: datetime,
+    days: int,
+    step: timedelta = timedelta(minutes=1),
+) -> ReplayReport:
+    """Set up the integration at the given time and replay the given days.
+
+    The latency for a day is measured from the publication of its prices
+    until the coordinator has them.
+    """
+    report = ReplayReport(days=days)
+
+    @callback
+    def is_integration_state(
+        event_data: EventStateChangedData | EventStateReportedData,
+    ) -> bool:
+        """Return if a state written belongs to the integration."""
+        return event_data["entity_id"].split(".", 1)[1].startswith(f"{DOMAIN}_")
+
+    @callback
+    def state_written(
+        event: Event[EventStateChangedData] | Event[EventStateReportedData],
+    ) -> None:
+        """Count the state writes of the integration."""
+        report.state_writes += 1
+        report.entity_writes[event.data["entity_id"]] += 1
+        if event.event_type == EVENT_STATE_REPORTED:
+            report.unchanged_writes += 1
+
+    freezer.move_to(start)
+    unsubs = [
+        hass.bus.async_listen(
+            EVENT_STATE_CHANGED, state_written, event_filter=is_integration_state
+        ),
+        hass.bus.async_listen(
+            EVENT_STATE_REPORTED, state_written, event_filter=is_integration_state
+        ),
+    ]
+    [entry] = await setup_regions(hass, [Region.FI])
+    coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    report.entities = sum(
+        entity_id.split(".", 1)[1].startswith(f"{DOMAIN}_")
+        for entity_id in hass.states.async_entity_ids()
+    )
+
+    end = start + timedelta(days=days)
+    while dt_util.utcnow() < end:
+        freezer.tick(step)
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+        tomorrow = dt_util.now(TIME_ZONE).date() + timedelta(days=1)
+        if (
+            tomorrow not in report.latencies
+            and coordinator.current_index is not None
+            and coordinator.current_index.day_prices(1) is not None
+        ):
+            report.latencies[tomorrow] = dt_util.utcnow() - server.published_at(
+                tomorrow
+            )
+
+    for unsub in unsubs:
+        unsub()
+    report.requests = server.requests
+    report.failures = server.failures
+    return report
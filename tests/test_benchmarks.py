@@ -0,0 +1,531 @@
+"""Benchmarks and budgets for the Spot-Hinta.fi hot paths.
+
+Every benchmark asserts a budget for its mean run time, so a regression in
+one of the hot paths fails the test suite. The budgets are deliberately
+generous, an order of magnitude above the typical run time, to keep the
+results stable on slow CI runners. The budget of every benchmark is kept in
+its extra info, to compare it with the results.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from pathlib import Path
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from spothinta_api.const import Region
+
+from custom_components.spothinta.cache import STORAGE_VERSION, serialize_prices
+from custom_components.spothinta.const import CONF_SHARED_CACHE_PATH, DOMAIN
+from custom_components.spothinta.coordinator import (
+    SpotHintaDataUpdateCoordinator,
+    build_forecast,
+    has_prices_for_tomorrow,
+    has_prices_for_tomorrow_until_next_day_refresh,
+)
+from custom_components.spothinta.price_index import (
+    PriceIndex,
+    get_next_interval_start,
+)
+from custom_components.spothinta.ranks import PriceRanks
+from custom_components.spothinta.rolling import RollingAggregates
+from custom_components.spothinta.sensor import SENSORS
+from custom_components.spothinta.shared import SharedPriceFile
+from custom_components.spothinta.statistics import hourly_statistics
+from custom_components.spothinta.storage import StorageConfig, plan_storage
+from custom_components.spothinta.thresholds import Threshold, threshold_crossings
+from custom_components.spothinta.transform import PriceTransform
+from custom_components.spothinta.windows import WindowFinder
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .conftest import FakeSpotHinta, make_electricity, setup_regions
+
+REGIONS = [
+    Region.FI,
+    Region.SE1,
+    Region.SE2,
+    Region.SE3,
+    Region.SE4,
+    Region.EE,
+    Region.LV,
+    Region.LT,
+]
+
+RESOLUTIONS = [
+    pytest.param(timedelta(minutes=15), id="15min"),
+    pytest.param(timedelta(minutes=5), id="5min"),
+]
+
+# Mean run time budgets, in seconds.
+INDEX_BUDGET_PER_DAY = 0.005
+TRANSFORM_BUDGET_PER_DAY = 0.005
+STATISTICS_BUDGET_PER_DAY = 0.005
+CROSSINGS_BUDGET_PER_DAY = 0.005
+RANKS_BUDGET_PER_DAY = 0.01
+STORAGE_BUDGET_PER_DAY = 0.05
+SCHEDULING_BUDGET = 0.001
+ROLLING_BUDGET = 0.001
+SENSOR_VALUES_BUDGET = 0.005
+REFRESH_BUDGET_PER_DAY = 0.025
+WRITE_CYCLE_BUDGET_PER_REGION = 0.005
+
+# Request budgets for getting the prices for tomorrow, per day.
+FIRST_DAY_REQUEST_BUDGET = 12
+REQUEST_BUDGET_PER_DAY = 6
+
+# Startup budgets, in seconds: importing the integration once Home Assistant
+# itself has been imported, and setting up a region from cached prices.
+IMPORT_BUDGET = 1.0
+SETUP_BUDGET = 2.0
+
+# Budget for loading the prices shared by another instance, in seconds.
+SHARED_LOAD_BUDGET = 0.05
+
+# Modules that are only imported when they are needed.
+LAZY_MODULES = (
+    "custom_components.spothinta.config_flow",
+    "homeassistant.components.recorder",
+)
+
+IMPORT_SCRIPT = f"""
+import sys
+import time
+
+import homeassistant.core
+import homeassistant.helpers.aiohttp_client
+import homeassistant.helpers.update_coordinator
+
+started = time.perf_counter()
+import custom_components.spothinta
+print(time.perf_counter() - started)
+print(",".join(module for module in {LAZY_MODULES!r} if module in sys.modules))
+"""
+
+# Memory budget for the prices of one region, in bytes per day of prices.
+MEMORY_BUDGET_PER_DAY = 128 * 1024
+
+
+def assert_within_budget(benchmark: BenchmarkFixture, budget: float) -> None:
+    """Record the budget of a benchmark and check its mean run time."""
+    benchmark.extra_info["budget"] = budget
+    assert benchmark.stats.stats.mean < budget
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+@pytest.mark.parametrize("days", [1, 2, 7])
+def test_build_price_index(
+    benchmark: BenchmarkFixture, days: int, resolution: timedelta
+) -> None:
+    """Benchmark building the price index for a fetch."""
+    energy_prices = make_electricity(days, resolution)
+
+    index = benchmark(PriceIndex, energy_prices)
+
+    assert len(index) == len(energy_prices.prices)
+    assert_within_budget(benchmark, INDEX_BUDGET_PER_DAY * days)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+@pytest.mark.parametrize("days", [1, 2, 7])
+def test_price_transform(
+    benchmark: BenchmarkFixture, days: int, resolution: timedelta
+) -> None:
+    """Benchmark calculating the total prices for a fetch."""
+    index = PriceIndex(make_electricity(days, resolution))
+    transform = PriceTransform(
+        vat=25.5,
+        margin=0.005,
+        transfer_day=0.04,
+        transfer_night=0.025,
+        transfer_winter_day=0.06,
+    )
+
+    total = benchmark(transform.apply, index)
+
+    assert len(total) == len(index)
+    assert all(
+        total_price > price
+        for total_price, price in zip(total.prices, index.prices, strict=True)
+    )
+    assert_within_budget(benchmark, TRANSFORM_BUDGET_PER_DAY * days)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+@pytest.mark.parametrize("days", [1, 2, 7])
+def test_hourly_statistics(
+    benchmark: BenchmarkFixture, days: int, resolution: timedelta
+) -> None:
+    """Benchmark aggregating the prices of a fetch into hourly statistics."""
+    index = PriceIndex(make_electricity(days, resolution))
+
+    statistics = benchmark(hourly_statistics, index)
+
+    assert len(statistics) == days * 24
+    assert all(row["min"] <= row["mean"] <= row["max"] for row in statistics)
+    assert_within_budget(benchmark, STATISTICS_BUDGET_PER_DAY * days)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+@pytest.mark.parametrize("days", [1, 2, 7])
+@pytest.mark.parametrize(
+    "threshold",
+    [
+        pytest.param(Threshold(below=10), id="below"),
+        pytest.param(Threshold(rank=16), id="rank"),
+    ],
+)
+def test_threshold_crossings(
+    benchmark: BenchmarkFixture,
+    days: int,
+    resolution: timedelta,
+    threshold: Threshold,
+) -> None:
+    """Benchmark calculating the threshold crossings for a fetch."""
+    index = PriceIndex(make_electricity(days, resolution))
+
+    crossings = benchmark(threshold_crossings, index, threshold)
+
+    assert crossings.times == sorted(crossings.times)
+    assert crossings.states[0] and not crossings.states[-1]
+    assert_within_budget(benchmark, CROSSINGS_BUDGET_PER_DAY * days)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+@pytest.mark.parametrize("days", [1, 2, 7])
+def test_price_ranks(
+    benchmark: BenchmarkFixture, days: int, resolution: timedelta
+) -> None:
+    """Benchmark ranking the prices of a fetch."""
+    index = PriceIndex(make_electricity(days, resolution))
+
+    ranks = benchmark(PriceRanks, index)
+
+    assert ranks.rank_today is not None
+    assert ranks.rank_24h is not None
+    assert ranks.quantile(25) <= ranks.quantile(50) <= ranks.quantile(75)
+    assert_within_budget(benchmark, RANKS_BUDGET_PER_DAY * days)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+def test_rolling_aggregates(
+    benchmark: BenchmarkFixture, resolution: timedelta
+) -> None:
+    """Benchmark moving the rolling aggregates to the next interval."""
+    index = PriceIndex(make_electricity(11, resolution))
+    rolling = RollingAggregates(index.interval)
+    positions = iter(range(len(index)))
+    # Fill the history for the longest rolling average first.
+    for _ in range(int(timedelta(days=7) / resolution)):
+        rolling.advance(index, index.time_at(next(positions)))
+
+    def advance() -> int:
+        position = next(positions)
+        rolling.advance(index, index.time_at(position))
+        return position
+
+    position = benchmark.pedantic(advance, rounds=200, warmup_rounds=5)
+
+    past = index.prices[
+        position + 1 - int(timedelta(days=7) / resolution) : position + 1
+    ]
+    coming = index.prices[position : position + int(timedelta(days=1) / resolution)]
+    assert rolling.average(168) == pytest.approx(sum(past) / len(past), abs=1e-5)
+    assert rolling.lowest(24) == round(min(coming), 5)
+    assert rolling.highest(24) == round(max(coming), 5)
+    assert_within_budget(benchmark, ROLLING_BUDGET)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+@pytest.mark.parametrize("days", [1, 2])
+def test_storage_plan(
+    benchmark: BenchmarkFixture, days: int, resolution: timedelta
+) -> None:
+    """Benchmark planning a battery over the prices of a fetch."""
+    index = PriceIndex(make_electricity(days, resolution))
+    storage = StorageConfig(capacity=13.5, power=5)
+
+    plan = benchmark(plan_storage, index, storage, 0.0, index.time_at(0))
+
+    assert plan is not None
+    assert len(plan.energy) == len(index)
+    assert plan.profit > 0
+    assert all(0 <= charge <= storage.capacity for charge in plan.state_of_charge)
+    assert all(
+        abs(energy) <= storage.power * index.interval / 3600 + 1e-3
+        for energy in plan.energy
+    )
+    assert_within_budget(benchmark, STORAGE_BUDGET_PER_DAY * days)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+def test_has_prices_for_tomorrow_until_next_day_refresh(
+    benchmark: BenchmarkFixture, resolution: timedelta
+) -> None:
+    """Benchmark checking if new prices are needed."""
+    index = PriceIndex(make_electricity(2, resolution))
+
+    assert benchmark(has_prices_for_tomorrow_until_next_day_refresh, index)
+    assert_within_budget(benchmark, SCHEDULING_BUDGET)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+def test_get_next_interval_start(
+    benchmark: BenchmarkFixture, resolution: timedelta
+) -> None:
+    """Benchmark calculating the time of the next sensor update."""
+    now = dt_util.utcnow()
+
+    next_update_at = benchmark(get_next_interval_start, now, resolution)
+
+    assert now < next_update_at <= now + resolution
+    assert next_update_at.timestamp() % resolution.total_seconds() == 0
+    assert_within_budget(benchmark, SCHEDULING_BUDGET)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+def test_price_lookup(benchmark: BenchmarkFixture, resolution: timedelta) -> None:
+    """Benchmark looking up the price of the next interval."""
+    index = PriceIndex(make_electricity(7, resolution))
+
+    price = benchmark(lambda: index.next_price)
+
+    assert price is not None
+    assert index.contiguous
+    assert_within_budget(benchmark, SCHEDULING_BUDGET)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+async def test_sensor_values(
+    hass: HomeAssistant,
+    benchmark: BenchmarkFixture,
+    spothinta: FakeSpotHinta,
+    resolution: timedelta,
+) -> None:
+    """Benchmark calculating the values of all sensors of a region."""
+    spothinta.resolution = resolution
+    [entry] = await setup_regions(hass, [Region.FI])
+    data = hass.data[DOMAIN][entry.entry_id].data
+
+    def values() -> list:
+        return [description.value_fn(data) for description in SENSORS]
+
+    assert all(value is not None for value in benchmark(values))
+    assert_within_budget(benchmark, SENSOR_VALUES_BUDGET)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+@pytest.mark.parametrize("days", [1, 2, 7])
+async def test_coordinator_refresh(
+    hass: HomeAssistant,
+    benchmark: BenchmarkFixture,
+    spothinta: FakeSpotHinta,
+    days: int,
+    resolution: timedelta,
+) -> None:
+    """Benchmark handling a fetch without any new prices in the coordinator."""
+    [entry] = await setup_regions(hass, [Region.FI])
+    coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    def setup() -> tuple[tuple, dict]:
+        # A new payload for every round, like a fetch from the API.
+        return (make_electricity(days, resolution),), {}
+
+    benchmark.pedantic(
+        coordinator.async_set_prices, setup=setup, rounds=200, warmup_rounds=5
+    )
+
+    assert_within_budget(benchmark, REFRESH_BUDGET_PER_DAY * days)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+async def test_coordinator_merge_tomorrow(
+    hass: HomeAssistant,
+    benchmark: BenchmarkFixture,
+    spothinta: FakeSpotHinta,
+    resolution: timedelta,
+) -> None:
+    """Benchmark merging tomorrow's prices into the prices for today."""
+    [entry] = await setup_regions(hass, [Region.FI])
+    coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    energy_prices = make_electricity(2, resolution)
+
+    def setup() -> tuple[tuple, dict]:
+        coordinator._set_prices(make_electricity(1, resolution))
+        return (energy_prices,), {}
+
+    benchmark.pedantic(
+        coordinator.async_set_prices, setup=setup, rounds=200, warmup_rounds=5
+    )
+
+    assert coordinator.current_data is not None
+    assert coordinator.current_data is not energy_prices
+    assert coordinator.current_data.prices == energy_prices.prices
+    expected = PriceIndex(energy_prices)
+    assert coordinator.current_index is not None
+    assert coordinator.current_index.timestamps == expected.timestamps
+    assert coordinator.current_index.days == expected.days
+    assert coordinator.data.forecast == build_forecast(expected)
+    assert_within_budget(benchmark, REFRESH_BUDGET_PER_DAY)
+
+
+@pytest.mark.parametrize("regions", [1, 4, 8])
+async def test_sensor_write_cycle(
+    hass: HomeAssistant,
+    benchmark: BenchmarkFixture,
+    spothinta: FakeSpotHinta,
+    regions: int,
+) -> None:
+    """Benchmark a quarter-hour sensor update across several regions."""
+    entries = await setup_regions(hass, REGIONS[:regions])
+    coordinators: list[SpotHintaDataUpdateCoordinator] = [
+        hass.data[DOMAIN][entry.entry_id] for entry in entries
+    ]
+
+    def tick() -> None:
+        for coordinator in coordinators:
+            coordinator.async_handle_tick()
+
+    benchmark(tick)
+
+    assert spothinta.requests == regions
+    assert_within_budget(benchmark, WRITE_CYCLE_BUDGET_PER_REGION * regions)
+
+
+@pytest.mark.parametrize("resolution", RESOLUTIONS)
+@pytest.mark.parametrize("days", [1, 2, 7])
+def test_memory_per_region(days: int, resolution: timedelta) -> None:
+    """Measure the memory held for the prices of one region."""
+    tracemalloc.start()
+    try:
+        energy_prices = make_electricity(days, resolution)
+        index = PriceIndex(energy_prices)
+        held = (
+            energy_prices,
+            index,
+            WindowFinder(index),
+            PriceRanks(index),
+            build_forecast(index),
+        )
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert held
+    scale = timedelta(minutes=15) / resolution
+    assert size < MEMORY_BUDGET_PER_DAY * days * scale
+
+
+async def test_requests_per_day(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    spothinta: FakeSpotHinta,
+) -> None:
+    """Load test the requests made to get the prices for tomorrow."""
+    published_at = datetime(2026, 3, 10, 12, 7, tzinfo=dt_util.UTC)
+    freezer.move_to(published_at.replace(hour=10, minute=0))
+    spothinta.published_at = published_at
+    [entry] = await setup_regions(hass, [Region.FI])
+    coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    requests = []
+    for day in range(8):
+        spothinta.published_at = published_at + timedelta(days=day)
+        freezer.move_to(spothinta.published_at.replace(hour=10, minute=0))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+        before = spothinta.requests
+        while dt_util.utcnow() < spothinta.published_at.replace(hour=14):
+            freezer.tick(timedelta(minutes=1))
+            async_fire_time_changed(hass)
+            await hass.async_block_till_done()
+
+        assert has_prices_for_tomorrow(coordinator.current_index)
+        requests.append(spothinta.requests - before)
+
+    # Without any history, polling starts at 11:00 UTC. Once the publication
+    # time has been learned, polling starts shortly before it.
+    assert requests[0] <= FIRST_DAY_REQUEST_BUDGET
+    assert max(requests[1:]) <= REQUEST_BUDGET_PER_DAY
+
+
+def test_import_time(benchmark: BenchmarkFixture) -> None:
+    """Measure importing the integration in a fresh interpreter."""
+
+    def import_integration() -> tuple[float, str]:
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT],
+            capture_output=True,
+            check=True,
+            cwd=Path(__file__).parents[1],
+            text=True,
+        ).stdout.splitlines()
+        return float(output[0]), output[1] if len(output) > 1 else ""
+
+    import_time, imported = benchmark.pedantic(import_integration, rounds=5)
+    benchmark.extra_info["import_time"] = import_time
+
+    assert imported == ""
+    assert import_time < IMPORT_BUDGET
+
+
+async def test_setup_from_cache(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    record_property: Callable[[str, object], None],
+    spothinta: FakeSpotHinta,
+) -> None:
+    """Measure setting up a region from the cached prices."""
+    key = f"{DOMAIN}.fi_prices"
+    hass_storage[key] = {
+        "version": STORAGE_VERSION,
+        "minor_version": 1,
+        "key": key,
+        "data": serialize_prices(PriceIndex(make_electricity(2))),
+    }
+
+    started = time.perf_counter()
+    [entry] = await setup_regions(hass, [Region.FI])
+    setup_time = time.perf_counter() - started
+    record_property("setup_time", setup_time)
+
+    # The entities are set up from the cache without waiting for the API.
+    assert spothinta.requests == 0
+    assert hass.data[DOMAIN][entry.entry_id].data.index.current_price is not None
+    assert setup_time < SETUP_BUDGET
+
+
+async def test_shared_prices(
+    hass: HomeAssistant,
+    tmp_path: Path,
+    record_property: Callable[[str, object], None],
+    spothinta: FakeSpotHinta,
+) -> None:
+    """Measure setting up a region from the prices shared by another instance."""
+    hass.config.allowlist_external_dirs.add(str(tmp_path))
+    shared = SharedPriceFile(hass, str(tmp_path), Region.FI, timedelta(minutes=15))
+    await shared.async_save(make_electricity(2))
+
+    started = time.perf_counter()
+    prices = await shared.async_load()
+    load_time = time.perf_counter() - started
+    record_property("load_time", load_time)
+    assert prices is not None
+    assert load_time < SHARED_LOAD_BUDGET
+
+    [entry] = await setup_regions(
+        hass, [Region.FI], {CONF_SHARED_CACHE_PATH: str(tmp_path)}
+    )
+
+    # Another instance already fetched the prices.
+    assert spothinta.requests == 0
+    assert hass.data[DOMAIN][entry.entry_id].data.index.current_price is not None
\ No newline at end of file
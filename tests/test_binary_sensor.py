@@ -0,0 +1,43 @@
+"""Tests for the binary sensors of the Spot-Hinta.fi integration."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from spothinta_api.const import Region
+
+from custom_components.spothinta.const import CONF_PRICE_THRESHOLDS, DOMAIN
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .conftest import FakeSpotHinta, make_electricity, setup_regions
+
+
+async def test_price_below_follows_current_price(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    spothinta: FakeSpotHinta,
+) -> None:
+    """Test that the binary sensor is on while the price is below the threshold."""
+    freezer.move_to(datetime(2026, 3, 10, 10, 7, tzinfo=dt_util.UTC))
+    await setup_regions(hass, [Region.FI], {CONF_PRICE_THRESHOLDS: ["10.0"]})
+    prices = make_electricity(spothinta.days).prices
+    entity_id = f"binary_sensor.{DOMAIN}_fi_energy_price_below_10_0"
+
+    states = set()
+    for _ in range(8 * 4):
+        now = dt_util.utcnow()
+        price = prices[now.replace(minute=now.minute // 15 * 15, second=0)]
+        state = hass.states.get(entity_id)
+        assert state is not None
+        assert state.state == (STATE_ON if price < 10 else STATE_OFF)
+        states.add(state.state)
+
+        freezer.tick(timedelta(minutes=15))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    # The threshold was crossed both ways.
+    assert states == {STATE_ON, STATE_OFF}
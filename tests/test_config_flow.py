@@ -0,0 +1,141 @@
+"""Tests for the config flow of the Spot-Hinta.fi integration."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+from spothinta_api.const import Region
+
+from custom_components.spothinta.config_flow import CLEARABLE_OPTIONS
+from custom_components.spothinta.const import (
+    CONF_PRICE_THRESHOLDS,
+    CONF_RESOLUTION,
+    CONF_SHARED_CACHE_PATH,
+    CONF_STORAGE_CAPACITY,
+    CONF_STORAGE_POWER,
+    CONF_STORAGE_SOC_ENTITY,
+    CONF_TRANSFER_WINTER_DAY,
+    CONF_WINDOW_HOURS,
+    DOMAIN,
+)
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+
+from .conftest import FakeSpotHinta, setup_regions
+
+OPTIONS = {
+    CONF_RESOLUTION: "15",
+    CONF_WINDOW_HOURS: [],
+    CONF_PRICE_THRESHOLDS: [],
+}
+
+
+@pytest.mark.parametrize(
+    ("user_input", "errors"),
+    [
+        ({CONF_WINDOW_HOURS: ["0"]}, {CONF_WINDOW_HOURS: "invalid_window_hours"}),
+        ({CONF_WINDOW_HOURS: ["25"]}, {CONF_WINDOW_HOURS: "invalid_window_hours"}),
+        ({CONF_WINDOW_HOURS: ["1.5"]}, {CONF_WINDOW_HOURS: "invalid_window_hours"}),
+        (
+            {CONF_PRICE_THRESHOLDS: ["cheap"]},
+            {CONF_PRICE_THRESHOLDS: "invalid_price_thresholds"},
+        ),
+        (
+            {CONF_PRICE_THRESHOLDS: ["inf"]},
+            {CONF_PRICE_THRESHOLDS: "invalid_price_thresholds"},
+        ),
+        (
+            {CONF_SHARED_CACHE_PATH: "/not/allowed"},
+            {CONF_SHARED_CACHE_PATH: "invalid_shared_cache_path"},
+        ),
+    ],
+)
+async def test_options_flow_errors(
+    hass: HomeAssistant,
+    spothinta: FakeSpotHinta,
+    user_input: dict[str, Any],
+    errors: dict[str, str],
+) -> None:
+    """Test that invalid options are shown as errors."""
+    [entry] = await setup_regions(hass, [Region.FI])
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {**OPTIONS, **user_input}
+    )
+
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == errors
+    assert entry.options == {}
+
+
+async def test_options_flow_missing_shared_cache_path(
+    hass: HomeAssistant, tmp_path: Path, spothinta: FakeSpotHinta
+) -> None:
+    """Test that the shared price directory has to exist."""
+    hass.config.allowlist_external_dirs.add(str(tmp_path))
+    [entry] = await setup_regions(hass, [Region.FI])
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {**OPTIONS, CONF_SHARED_CACHE_PATH: str(tmp_path / "missing")},
+    )
+
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {CONF_SHARED_CACHE_PATH: "invalid_shared_cache_path"}
+
+
+async def test_options_flow_clears_options(
+    hass: HomeAssistant, tmp_path: Path, spothinta: FakeSpotHinta
+) -> None:
+    """Test that the options left out of the form are removed."""
+    hass.config.allowlist_external_dirs.add(str(tmp_path))
+    [entry] = await setup_regions(
+        hass,
+        [Region.FI],
+        {
+            CONF_TRANSFER_WINTER_DAY: 0.05,
+            CONF_STORAGE_CAPACITY: 10,
+            CONF_STORAGE_POWER: 5,
+            CONF_STORAGE_SOC_ENTITY: "sensor.battery",
+            CONF_SHARED_CACHE_PATH: str(tmp_path),
+        },
+    )
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], OPTIONS
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert not set(CLEARABLE_OPTIONS) & set(entry.options)
+
+
+async def test_options_flow_reloads_entry(
+    hass: HomeAssistant, spothinta: FakeSpotHinta
+) -> None:
+    """Test that saving the options reloads the entry with them."""
+    [entry] = await setup_regions(hass, [Region.FI])
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {
+            **OPTIONS,
+            CONF_WINDOW_HOURS: ["3", "1", "3"],
+            CONF_PRICE_THRESHOLDS: ["5", "0.10", "5.0"],
+        },
+    )
+    await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert entry.options[CONF_WINDOW_HOURS] == ["1", "3"]
+    assert entry.options[CONF_PRICE_THRESHOLDS] == ["0.1", "5.0"]
+    assert entry.state is ConfigEntryState.LOADED
+    assert hass.data[DOMAIN][entry.entry_id] is not coordinator
+    assert hass.states.get(f"sensor.{DOMAIN}_fi_energy_cheapest_window_3h")
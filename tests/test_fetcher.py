@@ -0,0 +1,64 @@
+"""Tests for the shared fetch engine of the Spot-Hinta.fi integration."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from spothinta_api import SpotHintaConnectionError, SpotHintaNoDataError
+from spothinta_api.const import Region
+
+from custom_components.spothinta.breaker import CLOSED, OPEN
+from custom_components.spothinta.const import DATA_FETCHER, DOMAIN, MAX_JITTER_SECONDS
+from custom_components.spothinta.fetcher import SpotHintaFetcher
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .conftest import FakeSpotHinta, setup_regions
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        SpotHintaConnectionError("Error occurred while communicating with the API."),
+        SpotHintaNoDataError("No energy prices found."),
+    ],
+)
+async def test_failed_probe_keeps_breaker_open(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    spothinta: FakeSpotHinta,
+    error: Exception,
+) -> None:
+    """Test that any failed probe opens the breaker again and is retried."""
+    freezer.move_to(datetime(2026, 3, 10, 8, tzinfo=dt_util.UTC))
+    await setup_regions(hass, [Region.FI])
+    fetcher: SpotHintaFetcher = hass.data[DOMAIN][DATA_FETCHER]
+    requests = spothinta.requests
+
+    async def async_retry() -> None:
+        assert fetcher.breaker.retry_at is not None
+        freezer.move_to(
+            fetcher.breaker.retry_at + timedelta(seconds=MAX_JITTER_SECONDS)
+        )
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    spothinta.error = error
+    fetcher.breaker.record_failure(dt_util.utcnow())
+    fetcher.async_request(Region.FI)
+    await hass.async_block_till_done()
+    assert spothinta.requests == requests
+
+    # Every failed probe backs off longer, and the region stays queued.
+    for failures in (2, 3):
+        await async_retry()
+        assert fetcher.breaker.state == OPEN
+        assert fetcher.breaker.failures == failures
+    assert spothinta.requests == requests + 2
+
+    spothinta.error = None
+    await async_retry()
+    assert fetcher.breaker.state == CLOSED
+    assert spothinta.requests == requests + 3
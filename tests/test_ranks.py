@@ -0,0 +1,40 @@
+"""Tests for the price ranks of the Spot-Hinta.fi integration."""
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+from spothinta_api import Electricity
+
+from custom_components.spothinta.price_index import PriceIndex
+from custom_components.spothinta.ranks import PriceRanks
+import homeassistant.util.dt as dt_util
+
+from .conftest import TIME_ZONE
+
+RESOLUTION = timedelta(minutes=15)
+
+
+def test_equal_prices_share_rank(freezer: FrozenDateTimeFactory) -> None:
+    """Test that equal prices get the same, lowest, rank today and in 24h."""
+    start = dt_util.as_utc(
+        datetime.combine(date(2026, 3, 10), time(), tzinfo=TIME_ZONE)
+    )
+    # Only a handful of distinct prices, so most of them are tied.
+    prices = {
+        start + position * RESOLUTION: float(position * 7 % 5)
+        for position in range(2 * 24 * 4)
+    }
+    index = PriceIndex(
+        Electricity(prices=prices, resolution=RESOLUTION, time_zone=TIME_ZONE)
+    )
+    ranks = PriceRanks(index)
+    items = sorted(prices.items())
+
+    for position, (moment, price) in enumerate(items):
+        freezer.move_to(moment)
+        day = items[position // 96 * 96 : position // 96 * 96 + 96]
+        upcoming = items[position : position + 96]
+
+        assert ranks.rank_today == 1 + sum(other < price for _, other in day)
+        assert ranks.rank_24h == 1 + sum(other < price for _, other in upcoming)
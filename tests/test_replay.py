@@ -0,0 +1,187 @@
+"""Replays of the Spot-Hinta.fi scheduler against a stand-in for the API.
+
+The replays check how many requests and state writes are needed, and how
+long it takes to get the prices for tomorrow, when the prices are published
+on time, late, or while the API is down.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+from freezegun.api import FrozenDateTimeFactory
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+)
+from spothinta_api.const import Region
+
+from custom_components.spothinta.breaker import CLOSED
+from custom_components.spothinta.const import (
+    DATA_FETCHER,
+    DOMAIN,
+    MAX_JITTER_SECONDS,
+    MAX_POLL_INTERVAL,
+    MAX_RETRY_INTERVAL,
+)
+from custom_components.spothinta.coordinator import (
+    SpotHintaDataUpdateCoordinator,
+    has_prices_for_tomorrow,
+)
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .conftest import setup_regions
+from .replay import Outage, ReplayServer, async_replay, record_report
+
+REGIONS = [
+    Region.FI,
+    Region.SE1,
+    Region.SE2,
+    Region.SE3,
+    Region.SE4,
+    Region.EE,
+    Region.LV,
+    Region.LT,
+]
+
+# Budgets for replaying a week of publications, on average per day. Late
+# publications and outages need more polling and retries.
+REPLAY_REQUEST_BUDGET_PER_DAY = 8
+REPLAY_FAILURE_REQUEST_BUDGET_PER_DAY = 16
+# At most one state write per entity for every price interval, on top of the
+# first one when the entity is added.
+STATE_WRITE_BUDGET_PER_ENTITY_PER_DAY = 24 * 4
+
+# Request budget while the API is down for two hours, on top of the first
+# failing request for every region.
+OUTAGE_PROBE_BUDGET = 8
+
+# Budgets for getting the prices for tomorrow once they can be fetched.
+LATENCY_BUDGET = MAX_POLL_INTERVAL + timedelta(seconds=MAX_JITTER_SECONDS)
+RETRY_LATENCY_BUDGET = MAX_RETRY_INTERVAL + timedelta(seconds=MAX_JITTER_SECONDS)
+
+
+async def test_replay_week(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    aioclient_mock: AiohttpClientMocker,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """Replay a week of prices published on time."""
+    start = datetime(2026, 3, 10, 10, tzinfo=dt_util.UTC)
+    server = ReplayServer(aioclient_mock)
+    server.add_synthetic_days(start.date(), 9)
+
+    report = await async_replay(hass, freezer, server, start, days=7)
+    record_report(record_property, report)
+
+    assert len(report.latencies) == 7
+    for day, latency in report.latencies.items():
+        assert timedelta() <= latency
+        assert server.published_at(day) + latency <= (
+            server.available_at(day) + LATENCY_BUDGET
+        )
+    assert report.failures == 0
+    assert report.requests_per_day <= REPLAY_REQUEST_BUDGET_PER_DAY
+    assert report.unchanged_writes == 0
+    assert max(report.entity_writes.values()) <= (
+        STATE_WRITE_BUDGET_PER_ENTITY_PER_DAY * report.days + 1
+    )
+
+
+async def test_replay_late_publications_and_outages(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    aioclient_mock: AiohttpClientMocker,
+    record_property: Callable[[str, object], None],
+) -> None:
+    """Replay a week with late publications, API errors and timeouts."""
+    start = datetime(2026, 3, 10, 10, tzinfo=dt_util.UTC)
+    server = ReplayServer(aioclient_mock)
+    server.add_synthetic_days(start.date(), 9)
+    server.publications[start.date() + timedelta(days=4)] = start.replace(
+        day=13, hour=15, minute=34
+    )
+    server.publications[start.date() + timedelta(days=6)] = start.replace(
+        day=15, hour=13, minute=51
+    )
+    server.outages = [
+        Outage(start.replace(day=11, hour=11), start.replace(day=11, hour=13)),
+        Outage(
+            start.replace(day=14, hour=12),
+            start.replace(day=14, hour=12, minute=40),
+            HTTPStatus.TOO_MANY_REQUESTS,
+        ),
+        Outage(
+            start.replace(day=16, hour=11, minute=50),
+            start.replace(day=16, hour=12, minute=20),
+            None,
+        ),
+    ]
+
+    report = await async_replay(hass, freezer, server, start, days=7)
+    record_report(record_property, report)
+
+    assert len(report.latencies) == 7
+    for day, latency in report.latencies.items():
+        available_at = server.available_at(day)
+        budget = (
+            RETRY_LATENCY_BUDGET
+            if available_at != server.published_at(day)
+            else LATENCY_BUDGET
+        )
+        assert server.published_at(day) + latency <= available_at + budget
+    assert report.failures > 0
+    assert report.requests_per_day <= REPLAY_FAILURE_REQUEST_BUDGET_PER_DAY
+    assert report.unchanged_writes == 0
+    assert max(report.entity_writes.values()) <= (
+        STATE_WRITE_BUDGET_PER_ENTITY_PER_DAY * report.days + 1
+    )
+
+
+async def test_requests_during_outage(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    aioclient_mock: AiohttpClientMocker,
+) -> None:
+    """Load test the requests made for all regions while the API is down."""
+    start = datetime(2026, 3, 10, 10, tzinfo=dt_util.UTC)
+    server = ReplayServer(aioclient_mock)
+    server.add_synthetic_days(start.date(), 3)
+    freezer.move_to(start)
+    entries = await setup_regions(hass, REGIONS)
+    fetcher = hass.data[DOMAIN][DATA_FETCHER]
+
+    # Concurrent refreshes of a region share one request.
+    before = server.requests
+    await asyncio.gather(*(fetcher.async_fetch(Region.FI) for _ in range(5)))
+    assert server.requests == before + 1
+
+    outage = Outage(
+        start.replace(hour=10, minute=30), start.replace(hour=12, minute=30)
+    )
+    server.outages = [outage]
+    freezer.move_to(outage.start)
+    before = server.requests
+    while dt_util.utcnow() < outage.end:
+        freezer.tick(timedelta(minutes=1))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    # Once every region has failed, only a single probe is sent at a time.
+    assert server.requests - before <= len(REGIONS) + OUTAGE_PROBE_BUDGET
+
+    while dt_util.utcnow() < outage.end + RETRY_LATENCY_BUDGET:
+        freezer.tick(timedelta(minutes=1))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    assert fetcher.breaker.state == CLOSED
+    for entry in entries:
+        coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][
+            entry.entry_id
+        ]
+        assert has_prices_for_tomorrow(coordinator.current_index)
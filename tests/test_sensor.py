@@ -0,0 +1,74 @@
+"""Tests for the sensors of the Spot-Hinta.fi integration."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from spothinta_api.const import Region
+
+from custom_components.spothinta.const import DOMAIN
+from custom_components.spothinta.coordinator import SpotHintaDataUpdateCoordinator
+from homeassistant.const import EVENT_STATE_CHANGED, EVENT_STATE_REPORTED
+from homeassistant.core import (
+    Event,
+    EventStateChangedData,
+    EventStateReportedData,
+    HomeAssistant,
+    callback,
+)
+import homeassistant.util.dt as dt_util
+
+from .conftest import FakeSpotHinta, setup_regions
+
+
+async def test_tick_only_writes_changed_states(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    spothinta: FakeSpotHinta,
+) -> None:
+    """Test that a new interval writes the changed states once, and only them."""
+    freezer.move_to(datetime(2026, 3, 10, 10, 7, tzinfo=dt_util.UTC))
+    [entry] = await setup_regions(hass, [Region.FI])
+    coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    writes: list[str] = []
+
+    @callback
+    def state_written(
+        event: Event[EventStateChangedData] | Event[EventStateReportedData],
+    ) -> None:
+        writes.append(event.data["entity_id"])
+
+    hass.bus.async_listen(EVENT_STATE_CHANGED, state_written)
+    hass.bus.async_listen(
+        EVENT_STATE_REPORTED, state_written, event_filter=callback(lambda _: True)
+    )
+
+    # Nothing changes within an interval.
+    coordinator.async_handle_tick()
+    await hass.async_block_till_done()
+    assert writes == []
+
+    states = {state.entity_id: state for state in hass.states.async_all()}
+    freezer.move_to(datetime(2026, 3, 10, 10, 15, tzinfo=dt_util.UTC))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+    changed = [
+        entity_id
+        for entity_id, state in states.items()
+        if (new_state := hass.states.get(entity_id)) is not None
+        and (new_state.state, new_state.attributes)
+        != (state.state, state.attributes)
+    ]
+    assert f"sensor.{DOMAIN}_fi_energy_current_price" in changed
+    assert f"sensor.{DOMAIN}_fi_energy_average_price_today" not in changed
+    assert sorted(writes) == sorted(changed)
+
+    # Nothing is written again until the next interval starts.
+    writes.clear()
+    freezer.tick(timedelta(minutes=14))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert writes == []
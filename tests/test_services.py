@@ -0,0 +1,178 @@
+"""Tests for the services of the Spot-Hinta.fi integration."""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+
+import pytest
+from spothinta_api.const import Region
+
+from custom_components.spothinta.const import (
+    CONF_STORAGE_CAPACITY,
+    CONF_STORAGE_EFFICIENCY,
+    CONF_STORAGE_POWER,
+    DOMAIN,
+)
+from custom_components.spothinta.coordinator import SpotHintaDataUpdateCoordinator
+from custom_components.spothinta.services import (
+    SERVICE_FIND_CHEAPEST_WINDOW,
+    SERVICE_PLAN_STORAGE,
+)
+from custom_components.spothinta.storage import StorageConfig, plan_storage
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+
+from .conftest import FakeSpotHinta, make_electricity, setup_regions
+
+
+@pytest.mark.parametrize("highest", [False, True])
+@pytest.mark.parametrize("hours", [1, 3, 8])
+async def test_find_cheapest_window(
+    hass: HomeAssistant,
+    spothinta: FakeSpotHinta,
+    hours: int,
+    highest: bool,
+) -> None:
+    """Test the window found is the best of all windows of its length."""
+    [entry] = await setup_regions(hass, [Region.FI])
+    prices = sorted(make_electricity(spothinta.days).prices.items())
+    start = prices[0][0]
+    intervals = int(timedelta(hours=hours) / spothinta.resolution)
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_FIND_CHEAPEST_WINDOW,
+        {
+            "config_entry": entry.entry_id,
+            "duration": {"hours": hours},
+            "start": start,
+            "most_expensive": highest,
+        },
+        blocking=True,
+        return_response=True,
+    )
+
+    sums = [
+        sum(price for _, price in prices[position : position + intervals])
+        for position in range(len(prices) - intervals + 1)
+    ]
+    best = (max if highest else min)(range(len(sums)), key=sums.__getitem__)
+    assert response is not None
+    assert response["start"] == prices[best][0].isoformat()
+    assert response["average_price"] == pytest.approx(
+        sums[best] / intervals, abs=1e-5
+    )
+    assert isinstance(response["intervals"], list)
+    assert len(response["intervals"]) == intervals
+
+
+@pytest.mark.parametrize("highest", [False, True])
+async def test_find_cheapest_scattered_intervals(
+    hass: HomeAssistant,
+    spothinta: FakeSpotHinta,
+    highest: bool,
+) -> None:
+    """Test the intervals found without contiguity are the best ones."""
+    [entry] = await setup_regions(hass, [Region.FI])
+    prices = sorted(make_electricity(spothinta.days).prices.items())
+    intervals = int(timedelta(hours=3) / spothinta.resolution)
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_FIND_CHEAPEST_WINDOW,
+        {
+            "config_entry": entry.entry_id,
+            "duration": {"hours": 3},
+            "start": prices[0][0],
+            "contiguous": False,
+            "most_expensive": highest,
+        },
+        blocking=True,
+        return_response=True,
+    )
+
+    best = sorted(price for _, price in prices)
+    if highest:
+        best.reverse()
+    assert response is not None
+    assert response["average_price"] == pytest.approx(
+        sum(best[:intervals]) / intervals, abs=1e-5
+    )
+
+
+@pytest.mark.parametrize(
+    ("options", "service_data", "storage"),
+    [
+        (
+            {CONF_STORAGE_CAPACITY: 10, CONF_STORAGE_POWER: 5},
+            {},
+            StorageConfig(capacity=10, power=5),
+        ),
+        (
+            {
+                CONF_STORAGE_CAPACITY: 10,
+                CONF_STORAGE_POWER: 5,
+                CONF_STORAGE_EFFICIENCY: 70,
+            },
+            {"capacity": 13.5, "power": 3},
+            StorageConfig(capacity=13.5, power=3, efficiency=70),
+        ),
+        (
+            {
+                CONF_STORAGE_CAPACITY: 10,
+                CONF_STORAGE_POWER: 5,
+                CONF_STORAGE_EFFICIENCY: 70,
+            },
+            {"capacity": 13.5, "power": 3, "efficiency": 95},
+            StorageConfig(capacity=13.5, power=3, efficiency=95),
+        ),
+        ({}, {"capacity": 2, "power": 1}, StorageConfig(capacity=2, power=1)),
+    ],
+)
+async def test_plan_storage(
+    hass: HomeAssistant,
+    spothinta: FakeSpotHinta,
+    options: dict[str, Any],
+    service_data: dict[str, Any],
+    storage: StorageConfig,
+) -> None:
+    """Test the battery of the options, or the one given, is planned for."""
+    [entry] = await setup_regions(hass, [Region.FI], options)
+    coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    index = coordinator.data.index
+    start = index.time_at(0)
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_PLAN_STORAGE,
+        {
+            "config_entry": entry.entry_id,
+            "state_of_charge": 50,
+            "start": start,
+            **service_data,
+        },
+        blocking=True,
+        return_response=True,
+    )
+
+    plan = plan_storage(index, storage, storage.capacity / 2, start)
+    assert plan is not None
+    assert response == plan.as_dict()
+    assert len(plan.energy) == len(index)
+    assert plan.profit > 0
+
+
+async def test_plan_storage_without_battery(
+    hass: HomeAssistant, spothinta: FakeSpotHinta
+) -> None:
+    """Test planning fails without a configured or given battery."""
+    [entry] = await setup_regions(hass, [Region.FI])
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_PLAN_STORAGE,
+            {"config_entry": entry.entry_id},
+            blocking=True,
+            return_response=True,
+        )
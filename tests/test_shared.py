@@ -0,0 +1,28 @@
+"""Tests for the prices shared between Spot-Hinta.fi instances."""
+from __future__ import annotations
+
+from datetime import timedelta
+from pathlib import Path
+
+from spothinta_api.const import Region
+
+from custom_components.spothinta.const import CONF_SHARED_CACHE_PATH
+from custom_components.spothinta.shared import SharedPriceFile
+from homeassistant.core import HomeAssistant
+
+from .conftest import FakeSpotHinta, make_electricity, setup_regions
+
+
+async def test_share_fetched_prices(
+    hass: HomeAssistant, tmp_path: Path, spothinta: FakeSpotHinta
+) -> None:
+    """Test that the first instance to fetch shares the prices."""
+    hass.config.allowlist_external_dirs.add(str(tmp_path))
+
+    await setup_regions(hass, [Region.FI], {CONF_SHARED_CACHE_PATH: str(tmp_path)})
+
+    assert spothinta.requests == 1
+    shared = SharedPriceFile(hass, str(tmp_path), Region.FI, timedelta(minutes=15))
+    prices = await shared.async_load()
+    assert prices is not None
+    assert len(prices.prices) == len(make_electricity(2).prices)
@@ -0,0 +1,71 @@
+"""Tests for the price triggers of the Spot-Hinta.fi integration."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    async_fire_time_changed,
+    async_mock_service,
+)
+from spothinta_api.const import Region
+
+from custom_components.spothinta.const import DOMAIN
+from homeassistant.components import automation
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+import homeassistant.util.dt as dt_util
+
+from .conftest import FakeSpotHinta, make_electricity, setup_regions
+
+
+@pytest.mark.parametrize("condition", ["below", "above"])
+async def test_trigger_fires_once_per_crossing(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    spothinta: FakeSpotHinta,
+    condition: str,
+) -> None:
+    """Test that the trigger fires once whenever the price crosses the threshold."""
+    freezer.move_to(datetime(2026, 3, 10, 10, 7, tzinfo=dt_util.UTC))
+    [entry] = await setup_regions(hass, [Region.FI])
+    calls = async_mock_service(hass, "test", "automation")
+    assert await async_setup_component(
+        hass,
+        automation.DOMAIN,
+        {
+            automation.DOMAIN: {
+                "trigger": {
+                    "platform": DOMAIN,
+                    "config_entry": entry.entry_id,
+                    condition: 10,
+                },
+                "action": {
+                    "service": "test.automation",
+                    "data_template": {"price": "{{ trigger.price }}"},
+                },
+            }
+        },
+    )
+
+    def matches(price: float) -> bool:
+        return price < 10 if condition == "below" else price > 10
+
+    # Every interval after the current one where the condition starts to hold.
+    prices = sorted(make_electricity(spothinta.days).prices.items())
+    now = dt_util.utcnow()
+    end = now + timedelta(hours=24)
+    expected = [
+        price
+        for (_, previous), (starts_at, price) in zip(prices, prices[1:], strict=False)
+        if now < starts_at < end and matches(price) and not matches(previous)
+    ]
+    assert expected
+
+    while dt_util.utcnow() < end:
+        freezer.tick(timedelta(minutes=5))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+    assert [call.data["price"] for call in calls] == pytest.approx(expected)
@@ -0,0 +1,103 @@
+"""Tests for the websocket API of the Spot-Hinta.fi integration."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import timedelta
+import json
+
+from freezegun.api import FrozenDateTimeFactory
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from pytest_homeassistant_custom_component.typing import WebSocketGenerator
+from spothinta_api.const import Region
+
+from custom_components.spothinta.const import DOMAIN
+from custom_components.spothinta.coordinator import SpotHintaDataUpdateCoordinator
+from homeassistant.core import HomeAssistant
+
+from .conftest import FakeSpotHinta, make_electricity, setup_regions
+
+# Budget for the message sent to a price subscriber when a new interval
+# starts, in bytes.
+TICK_MESSAGE_BUDGET = 64
+
+
+async def test_subscribe_prices(
+    hass: HomeAssistant,
+    hass_ws_client: WebSocketGenerator,
+    freezer: FrozenDateTimeFactory,
+    record_property: Callable[[str, object], None],
+    spothinta: FakeSpotHinta,
+) -> None:
+    """Measure the messages sent to a price subscriber."""
+    spothinta.days = 1
+    [entry] = await setup_regions(hass, [Region.FI])
+    coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    client = await hass_ws_client(hass)
+
+    await client.send_json_auto_id(
+        {"type": "spothinta/subscribe_prices", "config_entry": entry.entry_id}
+    )
+    assert (await client.receive_json())["success"]
+    curve = (await client.receive_json())["event"]
+    assert len(curve["prices"]) == len(make_electricity(1).prices)
+
+    # Only the prices for tomorrow are sent once they are fetched.
+    tomorrow = make_electricity(2)
+    coordinator.async_set_prices(tomorrow)
+    await hass.async_block_till_done()
+    event = (await client.receive_json())["event"]
+    assert "start" not in event
+    assert event["offset"] == len(curve["prices"])
+    assert curve["prices"] + event["prices"] == [
+        round(price, 5) for _, price in sorted(tomorrow.prices.items())
+    ]
+
+    # Only the position of the current interval is sent when it changes.
+    freezer.tick(timedelta(minutes=15))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    message = await client.receive_json()
+    assert message["event"] == {"current": curve["current"] + 1}
+
+    tick_size = len(json.dumps(message))
+    record_property("curve_size", len(json.dumps(curve)))
+    record_property("tick_size", tick_size)
+    assert tick_size < TICK_MESSAGE_BUDGET
+
+
+async def test_subscription_ends_on_unload(
+    hass: HomeAssistant,
+    hass_ws_client: WebSocketGenerator,
+    spothinta: FakeSpotHinta,
+) -> None:
+    """Test that a subscription ends once its config entry is unloaded."""
+    [entry] = await setup_regions(hass, [Region.FI])
+    client = await hass_ws_client(hass)
+
+    await client.send_json_auto_id(
+        {"type": "spothinta/subscribe_prices", "config_entry": entry.entry_id}
+    )
+    subscribed = await client.receive_json()
+    assert subscribed["success"]
+    await client.receive_json()
+
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    await client.send_json_auto_id(
+        {"type": "unsubscribe_events", "subscription": subscribed["id"]}
+    )
+    assert not (await client.receive_json())["success"]
+
+    # A new subscription follows the reloaded config entry.
+    coordinator: SpotHintaDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    await client.send_json_auto_id(
+        {"type": "spothinta/subscribe_prices", "config_entry": entry.entry_id}
+    )
+    assert (await client.receive_json())["success"]
+    curve = (await client.receive_json())["event"]
+
+    coordinator.async_set_prices(make_electricity(3))
+    await hass.async_block_till_done()
+    event = (await client.receive_json())["event"]
+    assert event["offset"] == len(curve["prices"])